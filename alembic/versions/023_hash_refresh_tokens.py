@@ -0,0 +1,54 @@
+"""Store SHA-256 digest of refresh tokens instead of plaintext
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-02-24
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "023"
+down_revision = "022"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("token_hash", sa.LargeBinary(length=32), nullable=True),
+    )
+    op.execute(
+        "UPDATE refresh_tokens SET token_hash = sha256(convert_to(token, 'UTF8'))"
+    )
+    op.alter_column("refresh_tokens", "token_hash", nullable=False)
+    op.create_index(
+        "ix_refresh_tokens_token_hash",
+        "refresh_tokens",
+        ["token_hash"],
+        unique=True,
+    )
+    op.drop_index("ix_refresh_tokens_token", table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "token")
+
+
+def downgrade() -> None:
+    # Plaintext tokens cannot be recovered from digests: restore the column
+    # with placeholder values and revoke every token.
+    op.add_column(
+        "refresh_tokens",
+        sa.Column("token", sa.String(), nullable=True),
+    )
+    op.execute(
+        "UPDATE refresh_tokens SET token = encode(token_hash, 'hex'), revoked = true"
+    )
+    op.alter_column("refresh_tokens", "token", nullable=False)
+    op.create_index(
+        "ix_refresh_tokens_token",
+        "refresh_tokens",
+        ["token"],
+        unique=True,
+    )
+    op.drop_index("ix_refresh_tokens_token_hash", table_name="refresh_tokens")
+    op.drop_column("refresh_tokens", "token_hash")
@@ -0,0 +1,38 @@
+"""Add case-insensitive unique indexes on user and pending registration emails
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-02-24
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "024"
+down_revision = "023"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_users_email_lower_unique",
+        "users",
+        [sa.text("lower(email)")],
+        unique=True,
+        postgresql_where=sa.text("is_deleted = false"),
+    )
+    op.create_index(
+        "ix_pending_registrations_email_lower",
+        "pending_registrations",
+        [sa.text("lower(email)")],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_pending_registrations_email_lower",
+        table_name="pending_registrations",
+    )
+    op.drop_index("ix_users_email_lower_unique", table_name="users")
@@ -0,0 +1,39 @@
+"""Add (lower(email), verification_code) covering index on pending registrations
+
+Revision ID: 025
+Revises: 024
+Create Date: 2026-02-25
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "025"
+down_revision = "024"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_pending_registrations_email_code",
+        "pending_registrations",
+        [sa.text("lower(email)"), "verification_code"],
+        unique=False,
+        postgresql_include=["password_hash", "verification_code_expires_at"],
+    )
+    # Case-sensitive unique index is redundant with ix_pending_registrations_email_lower
+    op.drop_index("ix_pending_registrations_email", table_name="pending_registrations")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_pending_registrations_email",
+        "pending_registrations",
+        ["email"],
+        unique=True,
+    )
+    op.drop_index(
+        "ix_pending_registrations_email_code",
+        table_name="pending_registrations",
+    )
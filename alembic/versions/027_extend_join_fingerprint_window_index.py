@@ -0,0 +1,39 @@
+"""Add created_at to join fingerprint lookup index
+
+Revision ID: 027
+Revises: 025
+Create Date: 2026-02-26
+
+"""
+from alembic import op
+
+revision = "027"
+down_revision = "025"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_session_join_fingerprints_session_hash_entry_created",
+        "session_join_fingerprints",
+        ["session_id", "fingerprint_hash", "entry_type", "created_at"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_session_join_fingerprints_session_hash_entry",
+        table_name="session_join_fingerprints",
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_session_join_fingerprints_session_hash_entry",
+        "session_join_fingerprints",
+        ["session_id", "fingerprint_hash", "entry_type"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_session_join_fingerprints_session_hash_entry_created",
+        table_name="session_join_fingerprints",
+    )
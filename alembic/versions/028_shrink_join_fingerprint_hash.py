@@ -0,0 +1,38 @@
+"""Store join fingerprints as 128-bit keyed BLAKE2s digests
+
+Revision ID: 028
+Revises: 027
+Create Date: 2026-02-26
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "028"
+down_revision = "027"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing SHA-256 digests cannot be converted; records only matter within
+    # the rolling join window, so they are dropped.
+    op.execute("DELETE FROM session_join_fingerprints")
+    op.alter_column(
+        "session_join_fingerprints",
+        "fingerprint_hash",
+        existing_type=sa.String(length=64),
+        type_=sa.String(length=32),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM session_join_fingerprints")
+    op.alter_column(
+        "session_join_fingerprints",
+        "fingerprint_hash",
+        existing_type=sa.String(length=32),
+        type_=sa.String(length=64),
+        existing_nullable=False,
+    )
@@ -0,0 +1,28 @@
+"""Add partial index on active session participants
+
+Revision ID: 029
+Revises: 028
+Create Date: 2026-02-26
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "029"
+down_revision = "028"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_session_participants_session_active",
+        "session_participants",
+        ["session_id"],
+        unique=False,
+        postgresql_where=sa.text("is_deleted = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_session_participants_session_active", table_name="session_participants")
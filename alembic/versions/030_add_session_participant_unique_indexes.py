@@ -0,0 +1,60 @@
+"""Add partial unique indexes for registered and guest session participants
+
+Replaces the non-unique (session_id, user_id) and (session_id, guest_email) indexes.
+
+Revision ID: 030
+Revises: 029
+Create Date: 2026-02-26
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "030"
+down_revision = "029"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Soft-delete duplicate active participants left by racing joins (keep the oldest)
+    op.execute(
+        """
+        UPDATE session_participants AS sp
+        SET is_deleted = true, deleted_at = now()
+        FROM session_participants AS keep
+        WHERE sp.is_deleted = false
+          AND keep.is_deleted = false
+          AND keep.session_id = sp.session_id
+          AND keep.id < sp.id
+          AND (
+            (sp.user_id IS NOT NULL AND keep.user_id = sp.user_id)
+            OR (sp.guest_email IS NOT NULL AND keep.guest_email = sp.guest_email)
+          )
+        """
+    )
+    op.create_index(
+        "uq_session_participants_session_user_active",
+        "session_participants",
+        ["session_id", "user_id"],
+        unique=True,
+        postgresql_where=sa.text("user_id IS NOT NULL AND is_deleted = false"),
+    )
+    op.create_index(
+        "uq_session_participants_session_guest_email_active",
+        "session_participants",
+        ["session_id", "guest_email"],
+        unique=True,
+        postgresql_where=sa.text("guest_email IS NOT NULL AND is_deleted = false"),
+    )
+    # Every (session_id, user_id / guest_email) lookup filters active rows, which
+    # the partial unique indexes above serve
+    op.drop_index("ix_session_participants_session_guest_email", table_name="session_participants")
+    op.drop_index("ix_session_participants_session_user", table_name="session_participants")
+
+
+def downgrade() -> None:
+    op.create_index("ix_session_participants_session_user", "session_participants", ["session_id", "user_id"], unique=False)
+    op.create_index("ix_session_participants_session_guest_email", "session_participants", ["session_id", "guest_email"], unique=False)
+    op.drop_index("uq_session_participants_session_guest_email_active", table_name="session_participants")
+    op.drop_index("uq_session_participants_session_user_active", table_name="session_participants")
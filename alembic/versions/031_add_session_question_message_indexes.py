@@ -0,0 +1,49 @@
+"""Add composite indexes for question message listing, replies and cooldown
+
+Revision ID: 031
+Revises: 030
+Create Date: 2026-02-26
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "031"
+down_revision = "030"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # list_by_module / count_top_level_by_module: live top-level messages of a module
+    op.create_index(
+        "ix_session_question_messages_module_top_level",
+        "session_question_messages",
+        ["session_module_id", "created_at"],
+        unique=False,
+        postgresql_where=sa.text("parent_id IS NULL AND is_deleted = false"),
+    )
+    # Reply threads and previews, oldest first
+    op.create_index(
+        "ix_session_question_messages_parent_active",
+        "session_question_messages",
+        ["parent_id", "created_at"],
+        unique=False,
+        postgresql_where=sa.text("is_deleted = false"),
+    )
+    # Per-participant cooldown lookups within a module
+    op.create_index(
+        "ix_session_question_messages_module_participant_created",
+        "session_question_messages",
+        ["session_module_id", "participant_id", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_session_question_messages_module_participant_created",
+        table_name="session_question_messages",
+    )
+    op.drop_index("ix_session_question_messages_parent_active", table_name="session_question_messages")
+    op.drop_index("ix_session_question_messages_module_top_level", table_name="session_question_messages")
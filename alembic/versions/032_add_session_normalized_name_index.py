@@ -0,0 +1,28 @@
+"""Add functional index for session name duplicate checks
+
+Revision ID: 032
+Revises: 031
+Create Date: 2026-02-26
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "032"
+down_revision = "031"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_sessions_workspace_normalized_name",
+        "sessions",
+        ["workspace_id", sa.text("lower(trim(name))")],
+        unique=False,
+        postgresql_where=sa.text("is_deleted = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_workspace_normalized_name", table_name="sessions")
@@ -0,0 +1,26 @@
+"""Add CHECK that a session never ends before it starts
+
+Revision ID: 033
+Revises: 032
+Create Date: 2026-02-26
+
+"""
+from alembic import op
+
+revision = "033"
+down_revision = "032"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NOT VALID: enforced for new writes without scanning (or failing on) existing rows
+    op.execute(
+        "ALTER TABLE sessions ADD CONSTRAINT ck_sessions_end_after_start "
+        "CHECK (end_datetime IS NULL OR start_datetime IS NULL OR end_datetime >= start_datetime) "
+        "NOT VALID"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("ck_sessions_end_after_start", "sessions", type_="check")
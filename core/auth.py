@@ -1,7 +1,14 @@
 """JWT authentication utilities."""
+import base64
+import hashlib
+import hmac
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import secrets
+import orjson
+from cachetools import TTLCache
 from jose import jwt, JWTError
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -14,21 +21,54 @@ from repositories.guest_email_verification_repository import GuestEmailVerificat
 security = HTTPBearer()
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
-    """Create JWT access token."""
+def _b64url(data: bytes) -> bytes:
+    """Base64url-encode without padding (JWS compact serialization)."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# HS256 tokens are signed with a prebuilt HMAC whose key schedule is computed
+# once; each token only serializes its payload and copies the prototype.
+# Other algorithms fall back to python-jose.
+_JWT_HEADER_B64 = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+_HS256_PROTOTYPE = (
+    hmac.new(settings.SECRET_KEY.encode("utf-8"), digestmod=hashlib.sha256)
+    if settings.ALGORITHM == "HS256"
+    else None
+)
+_DEFAULT_ACCESS_TTL_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+def _encode_jwt(payload: dict) -> str:
+    """Encode and sign JWT payload (exp must already be a numeric timestamp)."""
+    if _HS256_PROTOTYPE is None:
+        return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return _sign_hs256(_b64url(orjson.dumps(payload)))
+
+
+def _sign_hs256(payload_b64: bytes) -> str:
+    """Sign an already base64url-encoded payload segment with the HS256 prototype."""
+    signing_input = _JWT_HEADER_B64 + b"." + payload_b64
+    mac = _HS256_PROTOTYPE.copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode("ascii")
+
+
+def create_access_token(
+    data: dict,
+    expires_delta: Optional[timedelta] = None,
+    now: Optional[datetime] = None,
+) -> str:
+    """Create JWT access token (`now` lets callers reuse their request timestamp)."""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
+    if now is None:
+        now = datetime.now(timezone.utc)
+    ttl_seconds = expires_delta.total_seconds() if expires_delta else _DEFAULT_ACCESS_TTL_SECONDS
+    to_encode["exp"] = int(now.timestamp() + ttl_seconds)
     # Ensure 'sub' is a string (JWT standard requires string subject)
     if "sub" in to_encode:
         to_encode["sub"] = str(to_encode["sub"])
     
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    return _encode_jwt(to_encode)
 
 
 def verify_token(token: str) -> Optional[dict]:
@@ -40,37 +80,75 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 
-def create_guest_access_token(email: str, expires_delta: Optional[timedelta] = None) -> str:
+# Decoded payloads of valid tokens keyed by the raw token. Clients re-send the
+# same token on every poll; entries are re-checked against exp on each hit.
+_verified_tokens: TTLCache = TTLCache(
+    maxsize=settings.TOKEN_VERIFY_CACHE_MAX_SIZE,
+    ttl=max(settings.TOKEN_VERIFY_CACHE_TTL_SECONDS, 1),
+)
+_verified_tokens_lock = threading.Lock()
+_TOKEN_CACHE_ENABLED = settings.TOKEN_VERIFY_CACHE_TTL_SECONDS > 0
+
+
+def verify_token_cached(token: str) -> Optional[dict]:
+    """Read-through cached verify_token (only valid tokens are cached). Treat result as read-only."""
+    if token.count(".") != 2:
+        return None
+    if not _TOKEN_CACHE_ENABLED:
+        return verify_token(token)
+    with _verified_tokens_lock:
+        payload = _verified_tokens.get(token)
+    if payload is not None:
+        exp = payload.get("exp")
+        if exp is None or exp > time.time():
+            return payload
+        return None
+    payload = verify_token(token)
+    if payload is not None:
+        with _verified_tokens_lock:
+            _verified_tokens[token] = payload
+    return payload
+
+
+_GUEST_TTL = timedelta(days=settings.GUEST_TOKEN_EXPIRE_DAYS)
+
+# Guest tokens share a constant claims prefix. Its longest whole-3-byte part is
+# base64url-encoded once; the leftover bytes are encoded with the varying tail
+# (sub, exp), so the concatenation equals encoding the full claims.
+_GUEST_CLAIMS_PREFIX = b'{"type":"session_guest","sub":'
+_GUEST_CLAIMS_SPLIT = len(_GUEST_CLAIMS_PREFIX) - len(_GUEST_CLAIMS_PREFIX) % 3
+_GUEST_CLAIMS_PREFIX_B64 = _b64url(_GUEST_CLAIMS_PREFIX[:_GUEST_CLAIMS_SPLIT])
+_GUEST_CLAIMS_PREFIX_REST = _GUEST_CLAIMS_PREFIX[_GUEST_CLAIMS_SPLIT:]
+_PARTICIPANT_TTL = timedelta(hours=settings.PARTICIPANT_TOKEN_EXPIRE_HOURS)
+
+
+def create_guest_access_token(email: str, expires_delta: Optional[timedelta] = None, now: Optional[datetime] = None) -> str:
     """Create JWT for session guest (email-code flow). Payload: sub=email, type=session_guest."""
-    if expires_delta is None:
-        expires_delta = timedelta(days=settings.GUEST_TOKEN_EXPIRE_DAYS)
-    to_encode = {
-        "sub": email,
-        "type": "session_guest",
-        "exp": datetime.now(timezone.utc) + expires_delta,
-    }
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    expire = (now or datetime.now(timezone.utc)) + (expires_delta or _GUEST_TTL)
+    exp = int(expire.timestamp())
+    if _HS256_PROTOTYPE is None:
+        return _encode_jwt({"sub": email, "type": "session_guest", "exp": exp})
+    tail = _GUEST_CLAIMS_PREFIX_REST + orjson.dumps(email) + b',"exp":' + str(exp).encode("ascii") + b"}"
+    return _sign_hs256(_GUEST_CLAIMS_PREFIX_B64 + _b64url(tail))
 
 
-def create_participant_token(participant_id: int, session_id: int, expires_delta: Optional[timedelta] = None) -> str:
+def create_participant_token(participant_id: int, session_id: int, expires_delta: Optional[timedelta] = None, now: Optional[datetime] = None) -> str:
     """Create JWT for anonymous session participant. Payload: sub=participant_id, session_id, type=session_participant."""
-    if expires_delta is None:
-        expires_delta = timedelta(hours=settings.PARTICIPANT_TOKEN_EXPIRE_HOURS)
-    to_encode = {
+    expire = (now or datetime.now(timezone.utc)) + (expires_delta or _PARTICIPANT_TTL)
+    return _encode_jwt({
         "sub": str(participant_id),
         "session_id": session_id,
         "type": "session_participant",
-        "exp": datetime.now(timezone.utc) + expires_delta,
-    }
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+        "exp": int(expire.timestamp()),
+    })
 
 
-def create_refresh_token(user_id: int) -> str:
+def create_refresh_token(user_id: Optional[int] = None) -> str:
     """
     Create a refresh token (random string, not JWT).
     
     Args:
-        user_id: User ID
+        user_id: User ID (unused; the token is not bound to its owner)
     
     Returns:
         Refresh token string
@@ -9,6 +9,8 @@ class Settings(BaseSettings):
     # API
     API_TITLE: str = "Interactive Classroom Platform API"
     API_VERSION: str = "1.0.0"
+    # Worker threads running sync endpoints and dependencies (anyio default is 40)
+    THREADPOOL_MAX_WORKERS: int = 40
     
     # Database
     DB_HOST: str = "localhost"
@@ -17,12 +19,36 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = "postgres"
     DB_NAME: str = "interactive_classroom"
     DB_ECHO: bool = False
+    # Connection pool (per worker process)
+    DB_POOL_SIZE: int = 25
+    DB_MAX_OVERFLOW: int = 25
+    DB_POOL_TIMEOUT_SECONDS: int = 5
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Compiled SQL statement cache entries (SQLAlchemy default is 500)
+    DB_QUERY_CACHE_SIZE: int = 1200
     
     # Security
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 720
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Background purge of revoked / long-expired refresh tokens (0 disables)
+    REFRESH_TOKEN_PURGE_INTERVAL_MINUTES: int = 60
+    REFRESH_TOKEN_PURGE_RETENTION_DAYS: int = 7
+    
+    # Password hashing (argon2id); existing bcrypt hashes are upgraded on login
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536  # KiB
+    PASSWORD_ARGON2_PARALLELISM: int = 1
+    # Per-process cache of user auth rows read by token refresh (login always reads the DB)
+    USER_AUTH_CACHE_TTL_SECONDS: int = 60  # 0 disables
+    USER_AUTH_CACHE_MAX_SIZE: int = 10000
+    # Per-process cache of decoded participant/guest tokens (polling endpoints)
+    TOKEN_VERIFY_CACHE_TTL_SECONDS: int = 30  # 0 disables
+    TOKEN_VERIFY_CACHE_MAX_SIZE: int = 10000
+    # Per-process memo of recent successful password verifications
+    PASSWORD_VERIFY_CACHE_TTL_SECONDS: int = 300  # 0 disables
+    PASSWORD_VERIFY_CACHE_MAX_SIZE: int = 10000
     
     # Cookie settings
     COOKIE_NAME: str = "refresh-token"
@@ -38,6 +64,13 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM_EMAIL: Optional[str] = None
     SMTP_USE_TLS: Optional[bool] = True
+    SMTP_TIMEOUT_SECONDS: int = 30
+    # Persistent SMTP connection is recycled after this many messages
+    SMTP_MAX_MESSAGES_PER_CONN: int = 100
+    # Verification emails waiting for the background sender
+    SMTP_QUEUE_MAX_SIZE: int = 1000
+    # Background sender threads, each holding one SMTP connection
+    SMTP_SENDER_WORKERS: int = 2
     
     # Verification code settings
     VERIFICATION_CODE_EXPIRE_MINUTES: int = 15
@@ -47,6 +80,22 @@ class Settings(BaseSettings):
     GUEST_TOKEN_EXPIRE_DAYS: int = 90
     PARTICIPANT_TOKEN_EXPIRE_HOURS: int = 7
     SESSION_JOIN_FINGERPRINT_LIMIT: int = 3
+    # Participant heartbeats are buffered in-process and written in one batch
+    # every interval (0 writes each heartbeat immediately)
+    HEARTBEAT_FLUSH_INTERVAL_SECONDS: int = 2
+    # Per-process cache of serialized Questions pages served to polling
+    # participants; writes in this process invalidate the module immediately
+    QUESTIONS_LIST_CACHE_TTL_SECONDS: int = 2  # 0 disables
+    QUESTIONS_LIST_CACHE_MAX_SIZE: int = 1000
+    # Per-process memo of confirmed (session_id, user_id) ownership for timer controls
+    LECTURER_ACCESS_CACHE_TTL_SECONDS: int = 30  # 0 disables
+    LECTURER_ACCESS_CACHE_MAX_SIZE: int = 10000
+    # Per-process cache of Timer states served to polling participants; timer
+    # controls in this process invalidate the module immediately
+    TIMER_STATE_CACHE_TTL_SECONDS: int = 1  # 0 disables
+    TIMER_STATE_CACHE_MAX_SIZE: int = 1000
+    # Key for join fingerprint digests; defaults to one derived from SECRET_KEY
+    SESSION_JOIN_FINGERPRINT_KEY: Optional[str] = None
 
     # Anonymous participant display
     ANONYMOUS_SLUG_PREFIX: str = "anon_"
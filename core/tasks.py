@@ -0,0 +1,75 @@
+"""Periodic background maintenance tasks."""
+import asyncio
+from datetime import timedelta
+from typing import Callable, List
+import structlog
+from core.config import settings
+from core.db import SessionLocal
+from repositories.refresh_token_repository import RefreshTokenRepository
+from services.session_participant_service import SessionParticipantService
+
+logger = structlog.get_logger(__name__)
+
+_tasks: List[asyncio.Task] = []
+
+
+def purge_refresh_tokens() -> None:
+    """Delete revoked and long-expired refresh tokens."""
+    db = SessionLocal()
+    try:
+        deleted = RefreshTokenRepository.purge_stale(
+            db, timedelta(days=settings.REFRESH_TOKEN_PURGE_RETENTION_DAYS)
+        )
+        if deleted:
+            logger.info("refresh_tokens_purged", deleted=deleted)
+    finally:
+        db.close()
+
+
+def flush_heartbeats() -> None:
+    """Write buffered participant heartbeats."""
+    db = SessionLocal()
+    try:
+        SessionParticipantService.flush_heartbeats(db)
+    finally:
+        db.close()
+
+
+async def _run_periodically(name: str, interval_seconds: float, job: Callable[[], None]) -> None:
+    """Run blocking job in a worker thread every interval_seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(job)
+        except Exception:
+            logger.error("background_task_failed", task=name, exc_info=True)
+
+
+def start_background_tasks() -> None:
+    """Schedule enabled periodic tasks on the running event loop."""
+    if settings.REFRESH_TOKEN_PURGE_INTERVAL_MINUTES > 0:
+        _tasks.append(asyncio.create_task(_run_periodically(
+            "purge_refresh_tokens",
+            settings.REFRESH_TOKEN_PURGE_INTERVAL_MINUTES * 60,
+            purge_refresh_tokens,
+        )))
+    if settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS > 0:
+        _tasks.append(asyncio.create_task(_run_periodically(
+            "flush_heartbeats",
+            settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS,
+            flush_heartbeats,
+        )))
+
+
+async def stop_background_tasks() -> None:
+    """Cancel scheduled tasks and wait for them to finish."""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    # Heartbeats received since the last flush
+    if settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS > 0:
+        try:
+            await asyncio.to_thread(flush_heartbeats)
+        except Exception:
+            logger.error("background_task_failed", task="flush_heartbeats", exc_info=True)
@@ -1,5 +1,6 @@
 """Authentication endpoints."""
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from core.db import get_db
 from core.config import settings
@@ -16,7 +17,7 @@ import structlog
 
 logger = structlog.get_logger(__name__)
 
-router = APIRouter(tags=["Authentication"])
+router = APIRouter(tags=["Authentication"], default_response_class=ORJSONResponse)
 
 
 @router.post(
@@ -88,7 +89,7 @@ async def register(
             first_name=register_data.first_name,
             last_name=register_data.last_name,
         )
-        return RegisterResponse(**result)
+        return RegisterResponse.model_validate(result, from_attributes=True)
     except ValueError as e:
         logger.warning("registration_failed", email=register_data.email, error=str(e))
         raise HTTPException(
@@ -167,7 +168,7 @@ async def verify_email(
             email=verify_data.email,
             code=verify_data.code
         )
-        return VerifyEmailResponse(**result)
+        return VerifyEmailResponse.model_validate(result, from_attributes=True)
     except ValueError as e:
         logger.warning("email_verification_failed", email=verify_data.email, error=str(e))
         raise HTTPException(
@@ -259,7 +260,7 @@ async def login(
             cookie_kwargs["max_age"] = settings.COOKIE_MAX_AGE
         response.set_cookie(**cookie_kwargs)
         
-        return LoginResponse(**result)
+        return LoginResponse.model_validate(result, from_attributes=True)
     except ValueError as e:
         logger.warning("login_failed", email=login_data.email, error=str(e))
         raise HTTPException(
@@ -320,7 +321,7 @@ async def resend_code(
             db=db,
             email=resend_data.email
         )
-        return ResendCodeResponse(**result)
+        return ResendCodeResponse.model_validate(result, from_attributes=True)
     except ValueError as e:
         logger.warning("resend_code_failed", email=resend_data.email, error=str(e))
         raise HTTPException(
@@ -417,7 +418,7 @@ async def refresh(
             samesite=settings.COOKIE_SAME_SITE
         )
         
-        return RefreshResponse(**result)
+        return RefreshResponse.model_validate(result, from_attributes=True)
     except ValueError as e:
         logger.warning("token_refresh_failed", error=str(e))
         # Clear cookie on error
@@ -697,6 +697,7 @@ class SessionQuestionMessageItem(BaseModel):
     is_answered: bool
     created_at: Optional[str] = None
     pinned_at: Optional[str] = None
+    reply_count: int = Field(0, description="Total non-deleted replies (children may be a preview)")
     children: List["SessionQuestionMessageItem"] = Field(default_factory=list)
 
 
@@ -715,6 +716,11 @@ class SessionQuestionMessagesResponse(BaseModel):
     settings: Optional[SessionQuestionModuleSettings] = None
 
 
+class SessionQuestionRepliesResponse(BaseModel):
+    """Replies to a question message."""
+    messages: List[SessionQuestionMessageItem]
+
+
 # Resolve forward reference for recursive SessionQuestionMessageItem
 SessionQuestionMessageItem.model_rebuild()
 
@@ -729,10 +735,14 @@ class SessionQuestionLecturerPatchRequest(BaseModel):
 
 # Timer module
 class SessionTimerStateResponse(BaseModel):
-    """Timer state for display."""
+    """Timer state for display. Changes only on lecturer start/pause/resume/reset."""
     is_paused: bool
-    end_at: Optional[str] = None
-    remaining_seconds: Optional[int] = None
+    end_at: Optional[str] = Field(
+        None, description="Absolute end time of a running timer; clients count down from it locally"
+    )
+    remaining_seconds: Optional[int] = Field(
+        None, description="Remaining seconds of a paused timer, as of the last transition"
+    )
     sound_notification_enabled: bool = True
 
 
@@ -40,7 +40,7 @@ def _handle_join_error(e: Exception, passcode: str) -> HTTPException:
         404: {"description": "Session not found"},
     },
 )
-async def join_anonymous(
+def join_anonymous(
     passcode: str,
     body: SessionJoinAnonymousRequest,
     db: Session = Depends(get_db),
@@ -75,7 +75,7 @@ async def join_anonymous(
         404: {"description": "Session not found"},
     },
 )
-async def join_registered(
+def join_registered(
     passcode: str,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
@@ -105,7 +105,7 @@ async def join_registered(
         404: {"description": "Session not found"},
     },
 )
-async def join_guest(
+def join_guest(
     passcode: str,
     body: SessionJoinGuestRequest,
     db: Session = Depends(get_db),
@@ -139,7 +139,7 @@ async def join_guest(
         501: {"description": "SSO not implemented"},
     },
 )
-async def join_sso(
+def join_sso(
     passcode: str,
     db: Session = Depends(get_db),
 ):
@@ -1,6 +1,7 @@
 """Session modules endpoints."""
 from typing import List, Optional
 from fastapi import APIRouter, Body, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from core.db import get_db
 from core.auth import get_current_user
@@ -56,7 +57,7 @@ router = APIRouter(prefix="/sessions/{session_id}/modules", tags=["Session Modul
         404: {"description": "Session not found"}
     }
 )
-async def list_session_modules(
+def list_session_modules(
     session_id: int,
     fields: Optional[str] = Query(None, description="Comma-separated list of fields to include (e.g., id,name,module_type)"),
     db: Session = Depends(get_db),
@@ -150,7 +151,7 @@ async def list_session_modules(
         404: {"description": "Session or workspace module not found"}
     }
 )
-async def create_session_module(
+def create_session_module(
     session_id: int,
     module_data: SessionModuleCreateRequest,
     fields: Optional[str] = Query(None, description="Comma-separated list of fields to include. If not specified, returns empty response."),
@@ -206,7 +207,7 @@ async def create_session_module(
         404: {"description": "Session not found"}
     }
 )
-async def deactivate_active_module(
+def deactivate_active_module(
     session_id: int,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
@@ -258,7 +259,7 @@ async def deactivate_active_module(
         404: {"description": "Module not found"}
     }
 )
-async def get_session_module(
+def get_session_module(
     session_id: int,
     module_id: int,
     fields: Optional[str] = Query(None, description="Comma-separated list of fields to include (e.g., id,name,module_type)"),
@@ -354,7 +355,7 @@ async def get_session_module(
         404: {"description": "Module not found"}
     }
 )
-async def update_session_module(
+def update_session_module(
     session_id: int,
     module_id: int,
     module_data: SessionModuleUpdateRequest,
@@ -403,7 +404,7 @@ async def update_session_module(
 
 
 @router.delete("/{module_id}", response_model=MessageResponse)
-async def delete_session_module(
+def delete_session_module(
     session_id: int,
     module_id: int,
     hard: bool = Query(False, description="Hard delete (permanent)"),
@@ -483,7 +484,7 @@ async def delete_session_module(
         404: {"description": "Module not found"}
     }
 )
-async def activate_session_module(
+def activate_session_module(
     session_id: int,
     module_id: int,
     fields: Optional[str] = Query(None, description="Comma-separated list of fields to include. If not specified, returns empty response."),
@@ -538,7 +539,7 @@ async def activate_session_module(
         404: {"description": "Session or module not found"},
     },
 )
-async def list_question_messages_lecturer(
+def list_question_messages_lecturer(
     session_id: int,
     module_id: int,
     db: Session = Depends(get_db),
@@ -551,7 +552,8 @@ async def list_question_messages_lecturer(
         result = SessionQuestionsService.list_messages_lecturer(
             db, session_id, current_user["user_id"], module_id, limit=limit, offset=offset
         )
-        return SessionQuestionMessagesResponse(**result)
+        # Already shaped like SessionQuestionMessagesResponse; encode directly
+        return ORJSONResponse(result)
     except ValueError as e:
         msg = str(e).lower()
         if "not found" in msg or "not authorized" in msg:
@@ -569,7 +571,7 @@ async def list_question_messages_lecturer(
         404: {"description": "Session, module or message not found"},
     },
 )
-async def patch_question_message(
+def patch_question_message(
     session_id: int,
     module_id: int,
     msg_id: int,
@@ -606,7 +608,7 @@ async def patch_question_message(
     summary="Lecturer: start timer",
     description="Start timer with duration_seconds from module settings.",
 )
-async def timer_start(
+def timer_start(
     session_id: int,
     module_id: int,
     db: Session = Depends(get_db),
@@ -627,7 +629,7 @@ async def timer_start(
     summary="Lecturer: pause timer",
     description="Pause timer. Client sends remaining_seconds.",
 )
-async def timer_pause(
+def timer_pause(
     session_id: int,
     module_id: int,
     body: SessionTimerPauseRequest,
@@ -651,7 +653,7 @@ async def timer_pause(
     summary="Lecturer: resume timer",
     description="Resume timer from remaining_seconds.",
 )
-async def timer_resume(
+def timer_resume(
     session_id: int,
     module_id: int,
     db: Session = Depends(get_db),
@@ -672,7 +674,7 @@ async def timer_resume(
     summary="Lecturer: reset timer",
     description="Reset timer to default state.",
 )
-async def timer_reset(
+def timer_reset(
     session_id: int,
     module_id: int,
     db: Session = Depends(get_db),
@@ -693,7 +695,7 @@ async def timer_reset(
     summary="Lecturer: set timer value",
     description="Set timer to paused state with given remaining_seconds (manual value).",
 )
-async def timer_set(
+def timer_set(
     session_id: int,
     module_id: int,
     body: SessionTimerPauseRequest,
@@ -115,7 +115,7 @@ def _can_access_participants_list(
         404: {"description": "Session not found"},
     },
 )
-async def heartbeat(
+def heartbeat(
     passcode: str,
     body: SessionHeartbeatRequest | None = Body(default=None),
     db: Session = Depends(get_db),
@@ -158,7 +158,7 @@ async def heartbeat(
         404: {"description": "Session not found"},
     },
 )
-async def list_participants_by_passcode(
+def list_participants_by_passcode(
     passcode: str,
     db: Session = Depends(get_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
@@ -200,7 +200,7 @@ async def list_participants_by_passcode(
         404: {"description": "Session or participant not found"},
     },
 )
-async def patch_own_participant_by_passcode(
+def patch_own_participant_by_passcode(
     passcode: str,
     body: SessionParticipantSelfPatchRequest,
     db: Session = Depends(get_db),
@@ -241,7 +241,7 @@ async def patch_own_participant_by_passcode(
         404: {"description": "Session not found"},
     },
 )
-async def list_modules_by_passcode(
+def list_modules_by_passcode(
     passcode: str,
     db: Session = Depends(get_db),
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
@@ -1,22 +1,25 @@
 """Questions module endpoints (by-passcode for participants)."""
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 
 from core.db import get_db
 from services.session_questions_service import SessionQuestionsService
 from services.session_participant_service import SessionParticipantService
+from utils.http_cache import etag_json_response
 from endpoints.v1.schemas import (
     SessionQuestionMessageCreateRequest,
     SessionQuestionMessagesResponse,
+    SessionQuestionRepliesResponse,
 )
 import structlog
 
 logger = structlog.get_logger(__name__)
 
-router = APIRouter(tags=["Session Questions"])
+router = APIRouter(tags=["Session Questions"], default_response_class=ORJSONResponse)
 optional_bearer = HTTPBearer(auto_error=False)
 
 
@@ -45,6 +48,7 @@ def _get_participant_id(
     description="List messages for Questions module. Requires participant auth.",
     responses={
         200: {"description": "Messages list"},
+        304: {"description": "Unchanged since the ETag sent in If-None-Match"},
         401: {"description": "Not authenticated"},
         404: {"description": "Session or module not found"},
     },
@@ -56,13 +60,52 @@ async def list_question_messages(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
     limit: int = Query(100, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    replies_preview: Optional[int] = Query(
+        None, ge=1, le=50, description="Return only the first N replies per message (reply_count has the total)"
+    ),
+    if_none_match: Optional[str] = Header(None),
 ):
     participant_id = _get_participant_id(passcode, db, credentials)
     try:
         result = SessionQuestionsService.list_messages(
-            db, passcode, module_id, participant_id, limit=limit, offset=offset
+            db, passcode, module_id, participant_id,
+            limit=limit, offset=offset, replies_preview=replies_preview,
         )
-        return SessionQuestionMessagesResponse(**result)
+        # Service dicts already match SessionQuestionMessagesResponse; skip
+        # re-validating the whole page and encode it straight with orjson.
+        # Unchanged polls get 304 with no body.
+        return etag_json_response(result, if_none_match)
+    except ValueError as e:
+        msg = str(e).lower()
+        if "not found" in msg:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get(
+    "/sessions/by-passcode/{passcode}/modules/questions/{module_id}/messages/{msg_id}/replies",
+    response_model=SessionQuestionRepliesResponse,
+    summary="List replies to a question",
+    description="Full reply thread of a message, oldest first. Requires participant auth.",
+    responses={
+        200: {"description": "Replies list"},
+        401: {"description": "Not authenticated"},
+        404: {"description": "Session, module or message not found"},
+    },
+)
+async def list_question_replies(
+    passcode: str,
+    module_id: int,
+    msg_id: int,
+    db: Session = Depends(get_db),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer),
+):
+    participant_id = _get_participant_id(passcode, db, credentials)
+    try:
+        result = SessionQuestionsService.list_replies(
+            db, passcode, module_id, msg_id, participant_id
+        )
+        return ORJSONResponse(result)
     except ValueError as e:
         msg = str(e).lower()
         if "not found" in msg:
@@ -1,10 +1,13 @@
 """Timer module endpoints (by-passcode for state, lecturer for control)."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
 from core.db import get_db
 from services.session_timer_service import SessionTimerService
 from endpoints.v1.schemas import SessionTimerStateResponse
+from utils.http_cache import etag_json_response
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -16,21 +19,30 @@ router = APIRouter(tags=["Session Timer"])
     "/sessions/by-passcode/{passcode}/modules/timer/{module_id}/state",
     response_model=SessionTimerStateResponse,
     summary="Get timer state",
-    description="Current timer state for participants and lecturer. No auth required.",
+    description="""
+    Current timer state for participants and lecturer. No auth required.
+
+    The state only changes when the lecturer starts, pauses, resumes or resets the
+    timer: clients should count down from `end_at` locally and poll just to pick up
+    transitions. Responses carry an ETag; send it back in `If-None-Match` to get an
+    empty 304 while the state is unchanged.
+    """,
     responses={
         200: {"description": "Timer state"},
+        304: {"description": "Timer state unchanged since the given ETag"},
         404: {"description": "Session or module not found"},
     },
 )
 async def get_timer_state(
     passcode: str,
     module_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db),
 ):
     """Get timer state for display."""
     try:
         result = SessionTimerService.get_state(db, passcode, module_id)
-        return SessionTimerStateResponse(**result)
+        return etag_json_response(result, if_none_match)
     except ValueError as e:
         msg = str(e).lower()
         if "not found" in msg:
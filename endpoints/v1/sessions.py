@@ -449,7 +449,6 @@ async def create_session(
         )
         
         db.commit()
-        db.refresh(session)
         
         # If fields not specified, return empty response
         fields_set = parse_fields(fields)
@@ -556,7 +555,6 @@ async def update_session(
         
         if updated:
             db.commit()
-            db.refresh(session)
         
         # If fields not specified, return empty response
         fields_set = parse_fields(fields)
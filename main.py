@@ -1,10 +1,13 @@
 """Main API application."""
+import asyncio
 import sys
 import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import anyio.to_thread
+import orjson
 import structlog
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,8 +17,16 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.exc import OperationalError, InterfaceError
 
 from core.config import settings
+from core.tasks import start_background_tasks, stop_background_tasks
+from utils.email_pool import shutdown_email_pool
 from endpoints.routes import api_router
 
+
+def _orjson_dumps(obj, **kwargs) -> str:
+    """Log line serializer; stdlib logging handlers expect str."""
+    return orjson.dumps(obj, default=repr).decode("utf-8")
+
+
 # Configure structured logging
 structlog.configure(
     processors=[
@@ -27,7 +38,7 @@ structlog.configure(
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
         structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
+        structlog.processors.JSONRenderer(serializer=_orjson_dumps)
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
@@ -120,11 +131,15 @@ async def root():
 @app.on_event("startup")
 async def startup_event():
     """Startup event handler."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADPOOL_MAX_WORKERS
+    start_background_tasks()
     logger.info("api_started", version=settings.API_VERSION)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler."""
+    await stop_background_tasks()
+    await asyncio.to_thread(shutdown_email_pool)
     logger.info("api_shutdown")
 
@@ -1,6 +1,6 @@
 """PendingRegistration ORM model for unverified registrations."""
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
 from core.db import Base
 
 
@@ -9,7 +9,7 @@ class PendingRegistration(Base):
     __tablename__ = "pending_registrations"
     
     id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, nullable=False, index=True)
+    email = Column(String, nullable=False)
     password_hash = Column(String, nullable=False)
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
@@ -18,6 +18,12 @@ class PendingRegistration(Base):
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     
     __table_args__ = (
-        Index('ix_pending_registrations_email', 'email', unique=True),
+        Index('ix_pending_registrations_email_lower', func.lower(email), unique=True),
+        Index(
+            'ix_pending_registrations_email_code',
+            func.lower(email),
+            verification_code,
+            postgresql_include=['password_hash', 'verification_code_expires_at'],
+        ),
         Index('ix_pending_registrations_expires_at', 'verification_code_expires_at'),
     )
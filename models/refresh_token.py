@@ -1,6 +1,6 @@
 """RefreshToken ORM model."""
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, LargeBinary, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from core.db import Base
 
@@ -11,7 +11,8 @@ class RefreshToken(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    token = Column(String, unique=True, nullable=False, index=True)
+    # SHA-256 digest of the token; the plaintext is never stored
+    token_hash = Column(LargeBinary(32), unique=True, nullable=False)
     expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     revoked = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -21,7 +22,7 @@ class RefreshToken(Base):
     
     __table_args__ = (
         Index('ix_refresh_tokens_user_id', 'user_id'),
-        Index('ix_refresh_tokens_token', 'token', unique=True),
+        Index('ix_refresh_tokens_token_hash', 'token_hash', unique=True),
         Index('ix_refresh_tokens_expires_at', 'expires_at'),
     )
 
@@ -1,6 +1,6 @@
 """Session ORM model."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, JSON
+from sqlalchemy import CheckConstraint, Column, Integer, String, Boolean, DateTime, ForeignKey, Index, JSON, func
 from sqlalchemy.orm import relationship
 from core.db import Base
 import enum
@@ -43,5 +43,15 @@ class Session(Base):
         Index('ix_sessions_workspace_id', 'workspace_id'),
         Index('ix_sessions_status', 'status'),
         Index('ix_sessions_passcode', 'passcode'),
+        Index(
+            'ix_sessions_workspace_normalized_name',
+            'workspace_id',
+            func.lower(func.trim(name)),
+            postgresql_where=(is_deleted == False),
+        ),
+        CheckConstraint(
+            'end_datetime IS NULL OR start_datetime IS NULL OR end_datetime >= start_datetime',
+            name='ck_sessions_end_after_start',
+        ),
     )
 
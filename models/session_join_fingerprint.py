@@ -14,7 +14,7 @@ class SessionJoinFingerprint(Base):
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False)
     participant_id = Column(Integer, ForeignKey("session_participants.id", ondelete="SET NULL"), nullable=True)
-    fingerprint_hash = Column(String(64), nullable=False)
+    fingerprint_hash = Column(String(32), nullable=False)
     entry_type = Column(String(32), nullable=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
 
@@ -23,10 +23,11 @@ class SessionJoinFingerprint(Base):
 
     __table_args__ = (
         Index(
-            "ix_session_join_fingerprints_session_hash_entry",
+            "ix_session_join_fingerprints_session_hash_entry_created",
             "session_id",
             "fingerprint_hash",
             "entry_type",
+            "created_at",
         ),
         Index("ix_session_join_fingerprints_participant_id", "participant_id"),
         Index("ix_session_join_fingerprints_created_at", "created_at"),
@@ -39,7 +39,20 @@ class SessionParticipant(Base):
 
     __table_args__ = (
         Index("ix_session_participants_session_id", "session_id"),
-        Index("ix_session_participants_session_user", "session_id", "user_id"),
-        Index("ix_session_participants_session_guest_email", "session_id", "guest_email"),
+        Index("ix_session_participants_session_active", "session_id", postgresql_where=(is_deleted == False)),
+        Index(
+            "uq_session_participants_session_user_active",
+            "session_id",
+            "user_id",
+            unique=True,
+            postgresql_where=(user_id.isnot(None) & (is_deleted == False)),
+        ),
+        Index(
+            "uq_session_participants_session_guest_email_active",
+            "session_id",
+            "guest_email",
+            unique=True,
+            postgresql_where=(guest_email.isnot(None) & (is_deleted == False)),
+        ),
         Index("ix_session_participants_last_heartbeat_at", "last_heartbeat_at"),
     )
@@ -32,12 +32,40 @@ class SessionQuestionMessage(Base):
     session_module = relationship("SessionModule", back_populates="question_messages")
     participant = relationship("SessionParticipant", back_populates="question_messages")
     parent = relationship("SessionQuestionMessage", remote_side="SessionQuestionMessage.id")
+    # Non-deleted replies, oldest first (read-only; replies are created via parent_id)
+    children = relationship(
+        "SessionQuestionMessage",
+        primaryjoin=(
+            "and_(remote(foreign(SessionQuestionMessage.parent_id)) == SessionQuestionMessage.id, "
+            "remote(SessionQuestionMessage.is_deleted) == False)"
+        ),
+        order_by="SessionQuestionMessage.created_at",
+        viewonly=True,
+    )
     likes = relationship("SessionQuestionMessageLike", back_populates="message", cascade="all, delete-orphan")
 
     __table_args__ = (
         Index("ix_session_question_messages_session_module_id", "session_module_id"),
         Index("ix_session_question_messages_participant_id", "participant_id"),
         Index("ix_session_question_messages_parent_id", "parent_id"),
+        Index(
+            "ix_session_question_messages_module_top_level",
+            "session_module_id",
+            "created_at",
+            postgresql_where=(parent_id.is_(None) & (is_deleted == False)),
+        ),
+        Index(
+            "ix_session_question_messages_parent_active",
+            "parent_id",
+            "created_at",
+            postgresql_where=(is_deleted == False),
+        ),
+        Index(
+            "ix_session_question_messages_module_participant_created",
+            "session_module_id",
+            "participant_id",
+            "created_at",
+        ),
     )
 
 
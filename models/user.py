@@ -1,6 +1,6 @@
 """User ORM model."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, func
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from core.db import Base
@@ -30,5 +30,6 @@ class User(Base):
     
     __table_args__ = (
         Index('ix_users_email_unique', 'email', unique=True, postgresql_where=(is_deleted == False)),
+        Index('ix_users_email_lower_unique', func.lower(email), unique=True, postgresql_where=(is_deleted == False)),
     )
 
@@ -14,6 +14,9 @@ class ModuleType(str, enum.Enum):
     TIMER = "timer"
 
 
+MODULE_TYPE_VALUES = frozenset(mt.value for mt in ModuleType)
+
+
 class WorkspaceModule(Base):
     """WorkspaceModule model."""
     __tablename__ = "workspace_modules"
@@ -2,6 +2,7 @@
 from datetime import datetime, timezone
 from typing import Optional
 
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session as DBSession
 
 from models.guest_email_verification import GuestEmailVerification
@@ -22,19 +23,18 @@ class GuestEmailVerificationRepository:
         db: DBSession,
         email: str,
         display_name: Optional[str] = None,
-    ) -> GuestEmailVerification:
-        """Create or update record by email (no commit)."""
-        rec = db.query(GuestEmailVerification).filter(
-            GuestEmailVerification.email == email
-        ).first()
+    ) -> None:
+        """Create or update record by email in one INSERT ... ON CONFLICT (no commit)."""
         now = datetime.now(timezone.utc)
-        if rec:
-            rec.display_name = display_name
-            rec.updated_at = now
-            return rec
-        rec = GuestEmailVerification(
+        stmt = insert(GuestEmailVerification).values(
             email=email,
             display_name=display_name,
+            created_at=now,
+            updated_at=now,
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[GuestEmailVerification.email],
+                set_={"display_name": stmt.excluded.display_name, "updated_at": now},
+            )
         )
-        db.add(rec)
-        return rec
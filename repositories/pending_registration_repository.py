@@ -1,9 +1,11 @@
 """PendingRegistration repository for database operations."""
 from datetime import datetime, timezone
 from typing import Optional, List
-from sqlalchemy import func
+from sqlalchemy import DateTime, String, exists, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from models.pending_registration import PendingRegistration
+from models.user import User
 
 
 class PendingRegistrationRepository:
@@ -18,9 +20,13 @@ class PendingRegistrationRepository:
         last_name: Optional[str],
         verification_code: str,
         verification_code_expires_at: datetime
-    ) -> PendingRegistration:
+    ) -> Optional[int]:
         """
-        Create a new pending registration.
+        Create a new pending registration unless the email is already taken.
+        
+        Single INSERT ... SELECT ... ON CONFLICT DO NOTHING: skipped when an
+        active user owns the email, and the lower(email) unique index rejects
+        a concurrent pending registration.
         
         Args:
             db: Database session
@@ -30,20 +36,41 @@ class PendingRegistrationRepository:
             verification_code_expires_at: Code expiration datetime
         
         Returns:
-            Created PendingRegistration instance
+            ID of created PendingRegistration, or None if email is taken
         """
-        pending_reg = PendingRegistration(
-            email=email,
-            password_hash=password_hash,
-            first_name=first_name,
-            last_name=last_name,
-            verification_code=verification_code,
-            verification_code_expires_at=verification_code_expires_at
+        user_exists = exists().where(
+            func.lower(User.email) == func.lower(email),
+            User.is_deleted == False
+        )
+        values = select(
+            literal(email, String),
+            literal(password_hash, String),
+            literal(first_name, String),
+            literal(last_name, String),
+            literal(verification_code, String),
+            literal(verification_code_expires_at, DateTime(timezone=True)),
+            literal(datetime.now(timezone.utc), DateTime(timezone=True)),
+        ).where(~user_exists)
+        stmt = (
+            insert(PendingRegistration)
+            .from_select(
+                [
+                    PendingRegistration.email,
+                    PendingRegistration.password_hash,
+                    PendingRegistration.first_name,
+                    PendingRegistration.last_name,
+                    PendingRegistration.verification_code,
+                    PendingRegistration.verification_code_expires_at,
+                    PendingRegistration.created_at,
+                ],
+                values,
+            )
+            .on_conflict_do_nothing()
+            .returning(PendingRegistration.id)
         )
-        db.add(pending_reg)
+        pending_reg_id = db.execute(stmt).scalar()
         db.commit()
-        db.refresh(pending_reg)
-        return pending_reg
+        return pending_reg_id
     
     @staticmethod
     def get_by_email(db: Session, email: str) -> Optional[PendingRegistration]:
@@ -124,6 +151,13 @@ class PendingRegistrationRepository:
             return True
         return False
     
+    @staticmethod
+    def discard_by_email(db: Session, email: str) -> int:
+        """Delete pending registration by email in one statement (without commit)."""
+        return db.query(PendingRegistration).filter(
+            func.lower(PendingRegistration.email) == func.lower(email)
+        ).delete(synchronize_session=False)
+    
     @staticmethod
     def delete_expired(db: Session) -> int:
         """
@@ -168,5 +202,4 @@ class PendingRegistrationRepository:
         pending_reg.verification_code = verification_code
         pending_reg.verification_code_expires_at = verification_code_expires_at
         db.commit()
-        db.refresh(pending_reg)
         return pending_reg
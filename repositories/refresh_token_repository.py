@@ -1,10 +1,17 @@
 """RefreshToken repository for database operations."""
-from datetime import datetime, timezone
+import hashlib
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+from sqlalchemy import delete, or_, update
 from sqlalchemy.orm import Session
 from models.refresh_token import RefreshToken
 
 
+def _hash_token(token: str) -> bytes:
+    """Return the SHA-256 digest under which a refresh token is stored."""
+    return hashlib.sha256(token.encode()).digest()
+
+
 class RefreshTokenRepository:
     """Repository for refresh token operations."""
     
@@ -29,13 +36,12 @@ class RefreshTokenRepository:
         """
         refresh_token = RefreshToken(
             user_id=user_id,
-            token=token,
+            token_hash=_hash_token(token),
             expires_at=expires_at,
             revoked=False
         )
         db.add(refresh_token)
         db.commit()
-        db.refresh(refresh_token)
         return refresh_token
     
     @staticmethod
@@ -51,10 +57,47 @@ class RefreshTokenRepository:
             RefreshToken instance or None
         """
         return db.query(RefreshToken).filter(
-            RefreshToken.token == token,
+            RefreshToken.token_hash == _hash_token(token),
             RefreshToken.revoked == False
         ).first()
     
+    @staticmethod
+    def rotate(
+        db: Session,
+        old_token: str,
+        new_token: str,
+        new_expires_at: datetime,
+        now: Optional[datetime] = None
+    ) -> Optional[int]:
+        """
+        Replace an active refresh token with a new one in a single UPDATE (without commit).
+        
+        Only a token that is neither revoked nor expired is rotated, so two
+        concurrent refreshes with the same token cannot both succeed.
+        
+        Args:
+            db: Database session
+            old_token: Current refresh token string
+            new_token: New refresh token string
+            new_expires_at: New token expiration datetime
+            now: Reference time for the expiry check
+        
+        Returns:
+            Owning user ID if the token was rotated, None otherwise
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        return db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == _hash_token(old_token),
+                RefreshToken.revoked == False,
+                RefreshToken.expires_at > now
+            )
+            .values(token_hash=_hash_token(new_token), expires_at=new_expires_at)
+            .returning(RefreshToken.user_id)
+        ).scalar()
+    
     @staticmethod
     def revoke_token(db: Session, token: str) -> bool:
         """
@@ -65,17 +108,19 @@ class RefreshTokenRepository:
             token: Refresh token string
         
         Returns:
-            True if token was revoked, False if not found
+            True if token was revoked, False if not found or already revoked
         """
-        refresh_token = db.query(RefreshToken).filter(
-            RefreshToken.token == token
-        ).first()
-        
-        if refresh_token:
-            refresh_token.revoked = True
-            db.commit()
-            return True
-        return False
+        revoked_id = db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == _hash_token(token),
+                RefreshToken.revoked == False
+            )
+            .values(revoked=True)
+            .returning(RefreshToken.id)
+        ).scalar()
+        db.commit()
+        return revoked_id is not None
     
     @staticmethod
     def revoke_all_user_tokens(db: Session, user_id: int) -> int:
@@ -114,3 +159,24 @@ class RefreshTokenRepository:
         db.commit()
         return count
 
+    
+    @staticmethod
+    def purge_stale(db: Session, retention: timedelta) -> int:
+        """
+        Delete revoked tokens and tokens expired for longer than retention.
+        
+        Args:
+            db: Database session
+            retention: How long expired tokens are kept
+        
+        Returns:
+            Number of tokens deleted
+        """
+        cutoff = datetime.now(timezone.utc) - retention
+        result = db.execute(
+            delete(RefreshToken).where(
+                or_(RefreshToken.revoked == True, RefreshToken.expires_at < cutoff)
+            )
+        )
+        db.commit()
+        return result.rowcount
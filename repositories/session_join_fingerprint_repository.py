@@ -2,6 +2,7 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session as DBSession
 
 from models.session_join_fingerprint import SessionJoinFingerprint
@@ -36,6 +37,47 @@ class SessionJoinFingerprintRepository:
             .count()
         )
 
+    @staticmethod
+    def create_and_count_since(
+        db: DBSession,
+        session_id: int,
+        fingerprint_hash: str,
+        entry_type: str,
+        created_after: datetime,
+        participant_id: Optional[int] = None,
+    ) -> int:
+        """
+        Insert join record and return how many matching records existed before it (no commit).
+        
+        Single INSERT ... RETURNING (SELECT count(*) ...): the subquery runs on the
+        statement snapshot, so the new row is not counted.
+        """
+        prior_count = (
+            select(func.count(SessionJoinFingerprint.id))
+            .join(
+                SessionParticipant,
+                SessionParticipant.id == SessionJoinFingerprint.participant_id,
+            )
+            .where(
+                SessionJoinFingerprint.session_id == session_id,
+                SessionJoinFingerprint.fingerprint_hash == fingerprint_hash,
+                SessionJoinFingerprint.entry_type == entry_type,
+                SessionJoinFingerprint.created_at >= created_after,
+                SessionParticipant.is_deleted == False,
+            )
+            .scalar_subquery()
+        )
+        return db.execute(
+            insert(SessionJoinFingerprint)
+            .values(
+                session_id=session_id,
+                participant_id=participant_id,
+                fingerprint_hash=fingerprint_hash,
+                entry_type=entry_type,
+            )
+            .returning(prior_count)
+        ).scalar()
+
     @staticmethod
     def create(
         db: DBSession,
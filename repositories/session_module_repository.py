@@ -1,6 +1,7 @@
 """SessionModule repository."""
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from models.session_module import SessionModule
 from models.session import Session as SessionModel
@@ -16,6 +17,13 @@ class SessionModuleRepository:
             SessionModule.id == module_id
         ).first()
     
+    @staticmethod
+    def lock(db: Session, module_id: int) -> None:
+        """Take a row lock on the module until the transaction ends (SELECT ... FOR UPDATE)."""
+        db.query(SessionModule.id).filter(
+            SessionModule.id == module_id
+        ).with_for_update().first()
+    
     @staticmethod
     def get_by_session_id(
         db: Session,
@@ -30,6 +38,19 @@ class SessionModuleRepository:
         
         return query.order_by(SessionModule.created_at.asc()).all()
     
+    @staticmethod
+    def get_names_matching_base(db: Session, session_id: int, base_name: str) -> List[str]:
+        """Get names of non-deleted session modules equal to base_name or suffixed as "base_name (n)"."""
+        rows = db.query(SessionModule.name).filter(
+            SessionModule.session_id == session_id,
+            SessionModule.is_deleted == False,
+            or_(
+                SessionModule.name == base_name,
+                SessionModule.name.startswith(f"{base_name} (", autoescape=True)
+            )
+        ).all()
+        return [row.name for row in rows]
+    
     @staticmethod
     def get_active_module(db: Session, session_id: int) -> Optional[SessionModule]:
         """Get active module for a session."""
@@ -118,17 +139,17 @@ class SessionModuleRepository:
         return module
     
     @staticmethod
-    def deactivate_all_modules(db: Session, session_id: int) -> None:
-        """Deactivate all modules in a session (without commit)."""
+    def deactivate_module(db: Session, session_id: int, module_id: int) -> None:
+        """Deactivate the given active module and clear session.active_module_id (without commit)."""
         db.query(SessionModule).filter(
-            SessionModule.session_id == session_id,
-            SessionModule.is_deleted == False
+            SessionModule.id == module_id,
+            SessionModule.session_id == session_id
         ).update({SessionModule.is_active: False})
         
-        # Clear session.active_module_id
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-        if session:
-            session.active_module_id = None
+        db.query(SessionModel).filter(
+            SessionModel.id == session_id,
+            SessionModel.active_module_id.isnot(None)
+        ).update({SessionModel.active_module_id: None})
     
     @staticmethod
     def update(
@@ -1,99 +1,139 @@
 """SessionModuleTimerState repository."""
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
+from sqlalchemy import DateTime, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session as DBSession
 
+from models.session import Session as SessionModel
+from models.session_module import SessionModule
 from models.session_module_timer_state import SessionModuleTimerState
 
 
 class SessionModuleTimerStateRepository:
-    """Repository for timer state."""
+    """Repository for timer state.
+
+    Mutators are single statements with RETURNING (populate_existing refreshes any
+    loaded instance), so no read-before-write and no reload after commit.
+    """
 
     @staticmethod
-    def get_by_module(db: DBSession, session_module_id: int) -> Optional[SessionModuleTimerState]:
-        """Get timer state by module ID."""
-        return db.query(SessionModuleTimerState).filter(
-            SessionModuleTimerState.session_module_id == session_module_id
+    def get_state_by_passcode(db: DBSession, passcode: str, session_module_id: int) -> Optional[Row]:
+        """
+        Timer read for participants as one Core SELECT (no ORM entities).
+
+        Returns None if no live session has the passcode. Otherwise a row with
+        passcode_session_id; the module's id, session_id, is_deleted, module_type, settings
+        (None if no module has that ID); and has_state, is_paused, end_at, remaining_seconds
+        (has_state None if the timer has no state yet).
+        """
+        return db.execute(
+            select(
+                SessionModel.id.label("passcode_session_id"),
+                SessionModule.id,
+                SessionModule.session_id,
+                SessionModule.is_deleted,
+                SessionModule.module_type,
+                SessionModule.settings,
+                SessionModuleTimerState.session_module_id.label("has_state"),
+                SessionModuleTimerState.is_paused,
+                SessionModuleTimerState.end_at,
+                SessionModuleTimerState.remaining_seconds,
+            )
+            .select_from(SessionModel)
+            .outerjoin(SessionModule, SessionModule.id == session_module_id)
+            .outerjoin(
+                SessionModuleTimerState,
+                SessionModuleTimerState.session_module_id == SessionModule.id,
+            )
+            .where(
+                SessionModel.passcode == passcode,
+                SessionModel.is_deleted == False,
+            )
         ).first()
 
     @staticmethod
-    def get_or_create(
-        db: DBSession,
-        session_module_id: int,
-    ) -> SessionModuleTimerState:
-        """Get existing state or create default (no commit)."""
-        state = SessionModuleTimerStateRepository.get_by_module(db, session_module_id)
-        if state:
-            return state
-        state = SessionModuleTimerState(
-            session_module_id=session_module_id,
-            is_paused=True,
-            end_at=None,
-            remaining_seconds=None,
-        )
-        db.add(state)
-        return state
+    def _upsert(db: DBSession, session_module_id: int, values: Dict[str, Any]) -> SessionModuleTimerState:
+        """INSERT ... ON CONFLICT (session_module_id) DO UPDATE ... RETURNING (no commit)."""
+        stmt = insert(SessionModuleTimerState).values(session_module_id=session_module_id, **values)
+        return db.execute(
+            stmt.on_conflict_do_update(index_elements=["session_module_id"], set_=values)
+            .returning(SessionModuleTimerState)
+            .execution_options(populate_existing=True)
+        ).scalar_one()
+
+    @staticmethod
+    def _update(db: DBSession, session_module_id: int, *criteria, **values) -> Optional[SessionModuleTimerState]:
+        """UPDATE ... RETURNING for an existing state (no commit). None if no row matched."""
+        return db.execute(
+            update(SessionModuleTimerState)
+            .where(SessionModuleTimerState.session_module_id == session_module_id, *criteria)
+            .values(**values)
+            .returning(SessionModuleTimerState)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
 
     @staticmethod
     def start(db: DBSession, session_module_id: int, duration_seconds: int) -> SessionModuleTimerState:
-        """Start timer: end_at = now + duration, is_paused = False (no commit)."""
-        state = SessionModuleTimerStateRepository.get_or_create(db, session_module_id)
+        """Start timer: end_at = now + duration, is_paused = False (no commit). Creates state if missing."""
         now = datetime.now(timezone.utc)
-        state.end_at = now + timedelta(seconds=duration_seconds)
-        state.remaining_seconds = None
-        state.is_paused = False
-        state.updated_at = now
-        return state
+        return SessionModuleTimerStateRepository._upsert(db, session_module_id, {
+            "end_at": now + timedelta(seconds=duration_seconds),
+            "remaining_seconds": None,
+            "is_paused": False,
+            "updated_at": now,
+        })
 
     @staticmethod
     def pause(db: DBSession, session_module_id: int, remaining_seconds: int) -> Optional[SessionModuleTimerState]:
         """Pause: remaining_seconds, is_paused = True, end_at = None (no commit)."""
-        state = SessionModuleTimerStateRepository.get_by_module(db, session_module_id)
-        if not state:
-            return None
-        now = datetime.now(timezone.utc)
-        state.remaining_seconds = remaining_seconds
-        state.end_at = None
-        state.is_paused = True
-        state.updated_at = now
-        return state
+        return SessionModuleTimerStateRepository._update(
+            db,
+            session_module_id,
+            remaining_seconds=remaining_seconds,
+            end_at=None,
+            is_paused=True,
+            updated_at=datetime.now(timezone.utc),
+        )
 
     @staticmethod
     def resume(db: DBSession, session_module_id: int) -> Optional[SessionModuleTimerState]:
-        """Resume: remaining_seconds -> end_at, is_paused = False (no commit)."""
-        state = SessionModuleTimerStateRepository.get_by_module(db, session_module_id)
-        if not state or state.remaining_seconds is None:
-            return None
+        """Resume: remaining_seconds -> end_at, is_paused = False (no commit). None unless paused with remaining."""
         now = datetime.now(timezone.utc)
-        state.end_at = now + timedelta(seconds=state.remaining_seconds)
-        state.remaining_seconds = None
-        state.is_paused = False
-        state.updated_at = now
-        return state
+        # end_at = now + remaining_seconds, computed in the UPDATE (make_interval's 7th arg is secs)
+        return SessionModuleTimerStateRepository._update(
+            db,
+            session_module_id,
+            SessionModuleTimerState.remaining_seconds.isnot(None),
+            end_at=literal(now, DateTime(timezone=True))
+            + func.make_interval(0, 0, 0, 0, 0, 0, SessionModuleTimerState.remaining_seconds),
+            remaining_seconds=None,
+            is_paused=False,
+            updated_at=now,
+        )
 
     @staticmethod
     def reset(db: DBSession, session_module_id: int) -> Optional[SessionModuleTimerState]:
         """Reset: clear state to default (no commit)."""
-        state = SessionModuleTimerStateRepository.get_by_module(db, session_module_id)
-        if not state:
-            return None
-        now = datetime.now(timezone.utc)
-        state.is_paused = True
-        state.end_at = None
-        state.remaining_seconds = None
-        state.updated_at = now
-        return state
+        return SessionModuleTimerStateRepository._update(
+            db,
+            session_module_id,
+            is_paused=True,
+            end_at=None,
+            remaining_seconds=None,
+            updated_at=datetime.now(timezone.utc),
+        )
 
     @staticmethod
     def set_paused_with_remaining(
         db: DBSession, session_module_id: int, remaining_seconds: int
     ) -> SessionModuleTimerState:
         """Set state to paused with given remaining_seconds (no commit). Creates state if missing."""
-        state = SessionModuleTimerStateRepository.get_or_create(db, session_module_id)
-        now = datetime.now(timezone.utc)
-        state.remaining_seconds = max(0, remaining_seconds)
-        state.end_at = None
-        state.is_paused = True
-        state.updated_at = now
-        return state
+        return SessionModuleTimerStateRepository._upsert(db, session_module_id, {
+            "remaining_seconds": max(0, remaining_seconds),
+            "end_at": None,
+            "is_paused": True,
+            "updated_at": datetime.now(timezone.utc),
+        })
@@ -1,13 +1,20 @@
 """SessionParticipant repository."""
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 
+from sqlalchemy import DateTime, Integer, and_, case, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session as DBSession
 
+from models.session import Session as SessionModel
 from models.session_participant import SessionParticipant, ParticipantType
+from models.user import User
+from models.guest_email_verification import GuestEmailVerification
 
 
 HEARTBEAT_ACTIVE_SECONDS = 30
+_HEARTBEAT_ACTIVE_WINDOW = timedelta(seconds=HEARTBEAT_ACTIVE_SECONDS)
 
 
 class SessionParticipantRepository:
@@ -21,6 +28,33 @@ class SessionParticipantRepository:
             SessionParticipant.is_deleted == False
         ).first()
 
+    @staticmethod
+    def get_for_session(db: DBSession, participant_id: int, session_id: int) -> Optional[SessionParticipant]:
+        """Get participant by ID only if it belongs to the session."""
+        return db.query(SessionParticipant).filter(
+            SessionParticipant.id == participant_id,
+            SessionParticipant.session_id == session_id,
+            SessionParticipant.is_deleted == False
+        ).first()
+
+    @staticmethod
+    def get_for_passcode(db: DBSession, participant_id: int, passcode: str) -> Optional[Row]:
+        """
+        Get participant by ID together with its non-deleted session matching passcode.
+        
+        Returns (participant, session) or None.
+        """
+        return db.execute(
+            select(SessionParticipant, SessionModel)
+            .join(SessionModel, SessionModel.id == SessionParticipant.session_id)
+            .where(
+                SessionParticipant.id == participant_id,
+                SessionParticipant.is_deleted == False,
+                SessionModel.passcode == passcode,
+                SessionModel.is_deleted == False
+            )
+        ).first()
+
     @staticmethod
     def get_by_session_and_user(db: DBSession, session_id: int, user_id: int) -> Optional[SessionParticipant]:
         """Get participant by session and user_id (for registered)."""
@@ -39,6 +73,60 @@ class SessionParticipantRepository:
             SessionParticipant.is_deleted == False
         ).first()
 
+    @staticmethod
+    def get_user_join_info(db: DBSession, session_id: int, user_id: int) -> Optional[Row]:
+        """
+        Get user display fields and the user's existing participant in the session, in one query.
+        
+        Returns (first_name, last_name, email, participant_id, participant_display_name)
+        or None if the user does not exist. Participant columns are None if not joined yet.
+        """
+        return db.execute(
+            select(
+                User.first_name,
+                User.last_name,
+                User.email,
+                SessionParticipant.id.label("participant_id"),
+                SessionParticipant.display_name.label("participant_display_name"),
+            )
+            .outerjoin(
+                SessionParticipant,
+                and_(
+                    SessionParticipant.session_id == session_id,
+                    SessionParticipant.user_id == User.id,
+                    SessionParticipant.is_deleted == False
+                )
+            )
+            .where(User.id == user_id)
+            .limit(1)
+        ).first()
+
+    @staticmethod
+    def get_guest_join_info(db: DBSession, session_id: int, email: str) -> Optional[Row]:
+        """
+        Get guest email verification and the guest's existing participant in the session, in one query.
+        
+        Returns (verification_display_name, participant_id, participant_display_name)
+        or None if the email is not verified. Participant columns are None if not joined yet.
+        """
+        return db.execute(
+            select(
+                GuestEmailVerification.display_name.label("verification_display_name"),
+                SessionParticipant.id.label("participant_id"),
+                SessionParticipant.display_name.label("participant_display_name"),
+            )
+            .outerjoin(
+                SessionParticipant,
+                and_(
+                    SessionParticipant.session_id == session_id,
+                    SessionParticipant.guest_email == GuestEmailVerification.email,
+                    SessionParticipant.is_deleted == False
+                )
+            )
+            .where(GuestEmailVerification.email == email)
+            .limit(1)
+        ).first()
+
     @staticmethod
     def get_by_session_id(db: DBSession, session_id: int) -> List[SessionParticipant]:
         """Get all participants for a session."""
@@ -47,23 +135,48 @@ class SessionParticipantRepository:
             SessionParticipant.is_deleted == False
         ).order_by(SessionParticipant.created_at).all()
 
+    @staticmethod
+    def list_with_activity(db: DBSession, session_id: int) -> List[Row]:
+        """
+        List participant fields for display with is_active computed in SQL.
+        
+        is_active is true when last_heartbeat_at is within HEARTBEAT_ACTIVE_SECONDS of now().
+        """
+        is_active = case(
+            (SessionParticipant.last_heartbeat_at >= func.now() - _HEARTBEAT_ACTIVE_WINDOW, True),
+            else_=False
+        ).label("is_active")
+        return db.execute(
+            select(
+                SessionParticipant.id,
+                SessionParticipant.display_name,
+                SessionParticipant.participant_type,
+                SessionParticipant.guest_email,
+                is_active,
+                SessionParticipant.is_banned,
+                SessionParticipant.created_at,
+            ).where(
+                SessionParticipant.session_id == session_id,
+                SessionParticipant.is_deleted == False
+            ).order_by(SessionParticipant.created_at)
+        ).all()
+
     @staticmethod
     def count_active(db: DBSession, session_id: int) -> int:
         """Count participants with last_heartbeat_at within HEARTBEAT_ACTIVE_SECONDS."""
-        threshold = datetime.now(timezone.utc) - timedelta(seconds=HEARTBEAT_ACTIVE_SECONDS)
-        return db.query(SessionParticipant).filter(
+        return db.query(func.count(SessionParticipant.id)).filter(
             SessionParticipant.session_id == session_id,
             SessionParticipant.is_deleted == False,
-            SessionParticipant.last_heartbeat_at >= threshold
-        ).count()
+            SessionParticipant.last_heartbeat_at >= func.now() - _HEARTBEAT_ACTIVE_WINDOW
+        ).scalar()
 
     @staticmethod
     def count_all(db: DBSession, session_id: int) -> int:
         """Count all participants for a session (not deleted)."""
-        return db.query(SessionParticipant).filter(
+        return db.query(func.count(SessionParticipant.id)).filter(
             SessionParticipant.session_id == session_id,
             SessionParticipant.is_deleted == False
-        ).count()
+        ).scalar()
 
     @staticmethod
     def create(
@@ -90,12 +203,78 @@ class SessionParticipantRepository:
         return p
 
     @staticmethod
-    def update_heartbeat(db: DBSession, participant_id: int) -> Optional[SessionParticipant]:
-        """Update last_heartbeat_at for participant (no commit)."""
-        p = SessionParticipantRepository.get_by_id(db, participant_id)
-        if p:
-            p.last_heartbeat_at = datetime.now(timezone.utc)
-        return p
+    def create_if_absent(
+        db: DBSession,
+        session_id: int,
+        participant_type: str,
+        display_name: Optional[str],
+        user_id: Optional[int] = None,
+        guest_email: Optional[str] = None,
+    ) -> Optional[Row]:
+        """
+        Create registered (user_id) or guest (guest_email) participant unless the session
+        already has an active one for them (no commit).
+        
+        Single INSERT ... ON CONFLICT DO NOTHING against the partial unique indexes.
+        Returns (id, display_name) of the created participant or None on conflict.
+        """
+        if user_id is not None:
+            conflict_columns = [SessionParticipant.session_id, SessionParticipant.user_id]
+            conflict_where = and_(SessionParticipant.user_id.isnot(None), SessionParticipant.is_deleted == False)
+        else:
+            conflict_columns = [SessionParticipant.session_id, SessionParticipant.guest_email]
+            conflict_where = and_(SessionParticipant.guest_email.isnot(None), SessionParticipant.is_deleted == False)
+        return db.execute(
+            insert(SessionParticipant)
+            .values(
+                session_id=session_id,
+                participant_type=participant_type,
+                user_id=user_id,
+                guest_email=guest_email,
+                display_name=display_name,
+            )
+            .on_conflict_do_nothing(index_elements=conflict_columns, index_where=conflict_where)
+            .returning(SessionParticipant.id, SessionParticipant.display_name)
+        ).first()
+
+    @staticmethod
+    def update_heartbeat(db: DBSession, participant_id: int) -> bool:
+        """Set last_heartbeat_at to now in a single UPDATE (no commit). Returns True if updated."""
+        result = db.execute(
+            update(SessionParticipant)
+            .where(
+                SessionParticipant.id == participant_id,
+                SessionParticipant.is_deleted == False
+            )
+            .values(last_heartbeat_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    def bulk_update_heartbeats(db: DBSession, heartbeats: Dict[int, datetime]) -> int:
+        """
+        Set last_heartbeat_at for many participants in one UPDATE ... FROM (VALUES ...) (no commit).
+        
+        Returns number of rows updated.
+        """
+        if not heartbeats:
+            return 0
+        data = values(
+            column("participant_id", Integer),
+            column("heartbeat_at", DateTime(timezone=True)),
+            name="data",
+        ).data(list(heartbeats.items()))
+        result = db.execute(
+            update(SessionParticipant)
+            .where(
+                SessionParticipant.id == data.c.participant_id,
+                SessionParticipant.is_deleted == False
+            )
+            .values(last_heartbeat_at=data.c.heartbeat_at)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
 
     @staticmethod
     def update_banned(db: DBSession, participant_id: int, is_banned: bool) -> Optional[SessionParticipant]:
@@ -1,9 +1,11 @@
 """SessionPendingEmailCode repository."""
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
+from sqlalchemy import delete
 from sqlalchemy.orm import Session as DBSession
 
+from models.session import Session as SessionModel
 from models.session_pending_email_code import SessionPendingEmailCode
 
 
@@ -11,18 +13,29 @@ class SessionPendingEmailCodeRepository:
     """Repository for pending email codes per session (one active per session_id + email)."""
 
     @staticmethod
-    def get_by_session_email_code(
+    def consume_by_passcode(
         db: DBSession,
-        session_id: int,
+        passcode: str,
         email: str,
         code: str
-    ) -> Optional[SessionPendingEmailCode]:
-        """Get pending record by session, email and code."""
-        return db.query(SessionPendingEmailCode).filter(
-            SessionPendingEmailCode.session_id == session_id,
-            SessionPendingEmailCode.email == email,
-            SessionPendingEmailCode.code == code
+    ) -> Optional[Tuple[int, datetime]]:
+        """
+        Delete matching pending record of a non-deleted session found by passcode (no commit).
+        
+        Single DELETE ... USING sessions ... RETURNING; returns (session_id, expires_at) or None.
+        """
+        row = db.execute(
+            delete(SessionPendingEmailCode)
+            .where(
+                SessionPendingEmailCode.session_id == SessionModel.id,
+                SessionModel.passcode == passcode,
+                SessionModel.is_deleted == False,
+                SessionPendingEmailCode.email == email,
+                SessionPendingEmailCode.code == code
+            )
+            .returning(SessionPendingEmailCode.session_id, SessionPendingEmailCode.expires_at)
         ).first()
+        return (row.session_id, row.expires_at) if row else None
 
     @staticmethod
     def create_or_update(
@@ -1,11 +1,18 @@
 """SessionQuestionMessage repository."""
-from datetime import datetime, timezone
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from sqlalchemy.orm import Session as DBSession, joinedload
-from sqlalchemy import desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session as DBSession, joinedload, selectinload
+from sqlalchemy import delete, desc, func, literal, null, select, update
 
+from models.session import Session as SessionModel
+from models.session_module import SessionModule
+from models.session_participant import SessionParticipant
 from models.session_question_message import SessionQuestionMessage, SessionQuestionMessageLike
+from models.workspace import Workspace
+from models.workspace_module import ModuleType
 
 
 class SessionQuestionMessageRepository:
@@ -25,13 +32,18 @@ class SessionQuestionMessageRepository:
         session_module_id: int,
         limit: int = 100,
         offset: int = 0,
+        load_children: bool = True,
     ) -> List[SessionQuestionMessage]:
         """List messages for module, sorted by likes_count DESC, created_at ASC.
-        Returns top-level messages only (parent_id is NULL). Children via parent relationship.
+        Returns top-level messages only (parent_id is NULL). Unless load_children is
+        False, replies are eager-loaded into children with one extra IN query.
         """
-        return db.query(SessionQuestionMessage).options(
-            joinedload(SessionQuestionMessage.participant),
-        ).filter(
+        options = [joinedload(SessionQuestionMessage.participant)]
+        if load_children:
+            options.append(
+                selectinload(SessionQuestionMessage.children).joinedload(SessionQuestionMessage.participant)
+            )
+        return db.query(SessionQuestionMessage).options(*options).filter(
             SessionQuestionMessage.session_module_id == session_module_id,
             SessionQuestionMessage.is_deleted == False,
             SessionQuestionMessage.parent_id == None,
@@ -51,25 +63,77 @@ class SessionQuestionMessageRepository:
             SessionQuestionMessage.is_deleted == False,
         ).order_by(SessionQuestionMessage.created_at).all()
 
+    @staticmethod
+    def list_reply_previews(
+        db: DBSession, parent_ids: List[int], per_parent: int
+    ) -> Dict[int, Tuple[int, List[SessionQuestionMessage]]]:
+        """
+        First per_parent replies (oldest first) and total reply count for each parent.
+
+        One query: replies are ranked and counted per parent with window functions,
+        so only the preview rows are loaded. Parents without replies are absent.
+        """
+        if not parent_ids:
+            return {}
+        ranked = select(
+            SessionQuestionMessage.id.label("id"),
+            func.row_number().over(
+                partition_by=SessionQuestionMessage.parent_id,
+                order_by=(SessionQuestionMessage.created_at, SessionQuestionMessage.id),
+            ).label("position"),
+            func.count().over(partition_by=SessionQuestionMessage.parent_id).label("reply_count"),
+        ).where(
+            SessionQuestionMessage.parent_id.in_(parent_ids),
+            SessionQuestionMessage.is_deleted == False,
+        ).subquery()
+        rows = db.query(SessionQuestionMessage, ranked.c.reply_count).join(
+            ranked, ranked.c.id == SessionQuestionMessage.id
+        ).options(
+            joinedload(SessionQuestionMessage.participant),
+        ).filter(
+            ranked.c.position <= per_parent,
+        ).order_by(ranked.c.position).all()
+        previews: Dict[int, Tuple[int, List[SessionQuestionMessage]]] = {}
+        for reply, reply_count in rows:
+            previews.setdefault(reply.parent_id, (reply_count, []))[1].append(reply)
+        return previews
+
     @staticmethod
     def count_top_level_by_module(db: DBSession, session_module_id: int) -> int:
         """Count top-level (parent_id is None) non-deleted messages in module."""
-        return db.query(SessionQuestionMessage).filter(
+        return db.query(func.count(SessionQuestionMessage.id)).filter(
             SessionQuestionMessage.session_module_id == session_module_id,
             SessionQuestionMessage.is_deleted == False,
             SessionQuestionMessage.parent_id == None,
-        ).count()
+        ).scalar()
 
     @staticmethod
-    def get_last_by_participant_in_module(
-        db: DBSession, session_module_id: int, participant_id: int
-    ) -> Optional[SessionQuestionMessage]:
-        """Get most recent message by participant in module (for cooldown)."""
-        return db.query(SessionQuestionMessage).filter(
-            SessionQuestionMessage.session_module_id == session_module_id,
-            SessionQuestionMessage.participant_id == participant_id,
-            SessionQuestionMessage.is_deleted == False,
-        ).order_by(desc(SessionQuestionMessage.created_at)).first()
+    def get_author_with_last_created_at(
+        db: DBSession, participant_id: int, session_module_id: int, since: Optional[datetime]
+    ) -> Optional[Row]:
+        """
+        (participant, last_created_at) in one query for posting checks.
+
+        last_created_at is the participant's most recent live message in the module after
+        since, as a scalar subquery, or None when since is None (cooldown off).
+        Returns None if the participant does not exist or is deleted.
+        """
+        last_created_at = (
+            select(func.max(SessionQuestionMessage.created_at))
+            .where(
+                SessionQuestionMessage.session_module_id == session_module_id,
+                SessionQuestionMessage.participant_id == participant_id,
+                SessionQuestionMessage.is_deleted == False,
+                SessionQuestionMessage.created_at > since,
+            )
+            .scalar_subquery()
+            if since is not None
+            else null()
+        )
+        return db.query(SessionParticipant, last_created_at.label("last_created_at")).filter(
+            SessionParticipant.id == participant_id,
+            SessionParticipant.is_deleted == False,
+        ).first()
 
     @staticmethod
     def create(
@@ -92,67 +156,130 @@ class SessionQuestionMessageRepository:
         return msg
 
     @staticmethod
-    def add_like(db: DBSession, message_id: int, participant_id: int) -> bool:
-        """Add like if not already present. Idempotent. Returns True if added, False if already liked.
-        Caller must increment likes_count and commit.
-        """
-        existing = db.query(SessionQuestionMessageLike).filter(
-            SessionQuestionMessageLike.message_id == message_id,
-            SessionQuestionMessageLike.participant_id == participant_id,
-        ).first()
-        if existing:
-            return False
-        like = SessionQuestionMessageLike(
-            message_id=message_id,
-            participant_id=participant_id,
+    def _message_in_module(message_id: int, session_module_id: int):
+        """EXISTS guard: message is live and belongs to the module."""
+        return (
+            select(SessionQuestionMessage.id)
+            .where(
+                SessionQuestionMessage.id == message_id,
+                SessionQuestionMessage.session_module_id == session_module_id,
+                SessionQuestionMessage.is_deleted == False,
+            )
+            .exists()
         )
-        db.add(like)
-        return True
 
     @staticmethod
-    def remove_like(db: DBSession, message_id: int, participant_id: int) -> bool:
-        """Remove like if present. Returns True if removed, False if it did not exist."""
-        existing = db.query(SessionQuestionMessageLike).filter(
-            SessionQuestionMessageLike.message_id == message_id,
-            SessionQuestionMessageLike.participant_id == participant_id,
+    def add_like(
+        db: DBSession, message_id: int, session_module_id: int, participant_id: int
+    ) -> Optional[Row]:
+        """
+        Add like if not already present and bump likes_count in one statement (without commit).
+
+        WITH added AS (INSERT ... ON CONFLICT DO NOTHING RETURNING id)
+        UPDATE messages SET likes_count = likes_count + (SELECT count(*) FROM added).
+        Returns (likes_count, changed) or None if the message is deleted or not in the module.
+        """
+        added = (
+            pg_insert(SessionQuestionMessageLike)
+            .from_select(
+                ["message_id", "participant_id"],
+                select(literal(message_id), literal(participant_id)).where(
+                    SessionQuestionMessageRepository._message_in_module(message_id, session_module_id)
+                ),
+            )
+            .on_conflict_do_nothing(index_elements=["message_id", "participant_id"])
+            .returning(SessionQuestionMessageLike.id)
+            .cte("added")
+        )
+        changed = select(func.count()).select_from(added).scalar_subquery()
+        return db.execute(
+            update(SessionQuestionMessage)
+            .where(
+                SessionQuestionMessage.id == message_id,
+                SessionQuestionMessage.session_module_id == session_module_id,
+                SessionQuestionMessage.is_deleted == False,
+            )
+            .values(likes_count=SessionQuestionMessage.likes_count + changed)
+            .returning(SessionQuestionMessage.likes_count, changed.label("changed"))
+            .execution_options(synchronize_session=False)
         ).first()
-        if not existing:
-            return False
-        db.delete(existing)
-        return True
 
     @staticmethod
-    def is_liked_by(db: DBSession, message_id: int, participant_id: int) -> bool:
-        """Check if participant has liked a message."""
-        existing = db.query(SessionQuestionMessageLike).filter(
-            SessionQuestionMessageLike.message_id == message_id,
-            SessionQuestionMessageLike.participant_id == participant_id,
+    def remove_like(
+        db: DBSession, message_id: int, session_module_id: int, participant_id: int
+    ) -> Optional[Row]:
+        """
+        Remove like if present and decrement likes_count in one statement (without commit).
+
+        Returns (likes_count, changed) or None if the message is deleted or not in the module.
+        """
+        removed = (
+            delete(SessionQuestionMessageLike)
+            .where(
+                SessionQuestionMessageLike.message_id == message_id,
+                SessionQuestionMessageLike.participant_id == participant_id,
+                SessionQuestionMessageRepository._message_in_module(message_id, session_module_id),
+            )
+            .returning(SessionQuestionMessageLike.id)
+            .cte("removed")
+        )
+        changed = select(func.count()).select_from(removed).scalar_subquery()
+        return db.execute(
+            update(SessionQuestionMessage)
+            .where(
+                SessionQuestionMessage.id == message_id,
+                SessionQuestionMessage.session_module_id == session_module_id,
+                SessionQuestionMessage.is_deleted == False,
+            )
+            .values(likes_count=func.greatest(SessionQuestionMessage.likes_count - changed, 0))
+            .returning(SessionQuestionMessage.likes_count, changed.label("changed"))
+            .execution_options(synchronize_session=False)
         ).first()
-        return existing is not None
 
     @staticmethod
-    def update_is_answered(db: DBSession, message_id: int, is_answered: bool) -> Optional[SessionQuestionMessage]:
-        """Update is_answered flag (no commit)."""
-        msg = SessionQuestionMessageRepository.get_by_id(db, message_id)
-        if msg:
-            msg.is_answered = is_answered
-        return msg
+    def get_liked_message_ids(
+        db: DBSession, message_ids: List[int], participant_id: int
+    ) -> Set[int]:
+        """Return the subset of message_ids liked by participant (one query)."""
+        if not message_ids:
+            return set()
+        rows = db.query(SessionQuestionMessageLike.message_id).filter(
+            SessionQuestionMessageLike.message_id.in_(message_ids),
+            SessionQuestionMessageLike.participant_id == participant_id,
+        ).all()
+        return {row.message_id for row in rows}
 
     @staticmethod
-    def update_pinned_at(
-        db: DBSession, message_id: int, pinned_at: Optional[datetime]
+    def lecturer_update(
+        db: DBSession,
+        user_id: int,
+        session_id: int,
+        session_module_id: int,
+        message_id: int,
+        changes: Dict[str, Any],
     ) -> Optional[SessionQuestionMessage]:
-        """Update pinned_at (no commit). pinned_at=None to unpin."""
-        msg = SessionQuestionMessageRepository.get_by_id(db, message_id)
-        if msg:
-            msg.pinned_at = pinned_at
-        return msg
+        """
+        Apply column changes to a live message as the session owner (without commit).
 
-    @staticmethod
-    def soft_delete(db: DBSession, message_id: int) -> Optional[SessionQuestionMessage]:
-        """Soft delete message (no commit)."""
-        msg = SessionQuestionMessageRepository.get_by_id(db, message_id)
-        if msg:
-            msg.is_deleted = True
-            msg.deleted_at = datetime.now(timezone.utc)
-        return msg
+        One UPDATE ... FROM session_modules, sessions, workspaces: the message must be in the
+        given live Questions module of the session, and the workspace must belong to user_id.
+        Returns the updated message or None if any of that does not hold.
+        """
+        return db.execute(
+            update(SessionQuestionMessage)
+            .where(
+                SessionQuestionMessage.id == message_id,
+                SessionQuestionMessage.is_deleted == False,
+                SessionQuestionMessage.session_module_id == session_module_id,
+                SessionModule.id == SessionQuestionMessage.session_module_id,
+                SessionModule.session_id == session_id,
+                SessionModule.is_deleted == False,
+                SessionModule.module_type == ModuleType.QUESTIONS.value,
+                SessionModel.id == SessionModule.session_id,
+                Workspace.id == SessionModel.workspace_id,
+                Workspace.user_id == user_id,
+            )
+            .values(**changes)
+            .returning(SessionQuestionMessage)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
@@ -2,8 +2,14 @@
 import copy
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy import false, func, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, joinedload
 from models.session import Session as SessionModel, SessionStatus
+from models.workspace import Workspace
+from models.guest_email_verification import GuestEmailVerification
+from models.session_participant import SessionParticipant
+from models.session_module import SessionModule
 from utils.settings import merge_settings
 
 
@@ -17,6 +23,42 @@ class SessionRepository:
             SessionModel.id == session_id
         ).first()
 
+    @staticmethod
+    def _get_loaded(db: Session, session_id: int) -> Optional[SessionModel]:
+        """
+        Session by primary key for mutators: served from the identity map when the
+        caller already loaded it in this transaction (no SELECT), queried otherwise.
+        """
+        return db.get(SessionModel, session_id)
+    
+    @staticmethod
+    def get_with_workspace(db: Session, session_id: int) -> Optional[SessionModel]:
+        """Get session by ID with its workspace loaded in the same query."""
+        return db.query(SessionModel).options(
+            joinedload(SessionModel.workspace)
+        ).filter(
+            SessionModel.id == session_id
+        ).first()
+
+    @staticmethod
+    def get_owner_probe(db: Session, session_id: int) -> Optional[Row]:
+        """
+        (id, is_deleted, workspace_id, owner_user_id) of a session, deleted included.
+        
+        Narrow columns only (no settings JSON) for decisions taken before a targeted UPDATE.
+        owner_user_id is None if the workspace is missing.
+        """
+        return db.execute(
+            select(
+                SessionModel.id,
+                SessionModel.is_deleted,
+                SessionModel.workspace_id,
+                Workspace.user_id.label("owner_user_id")
+            )
+            .outerjoin(Workspace, Workspace.id == SessionModel.workspace_id)
+            .where(SessionModel.id == session_id)
+        ).first()
+    
     @staticmethod
     def get_by_passcode(db: Session, passcode: str) -> Optional[SessionModel]:
         """Get non-deleted session by passcode (for guest join by link)."""
@@ -25,6 +67,94 @@ class SessionRepository:
             SessionModel.is_deleted == False
         ).first()
     
+    @staticmethod
+    def get_join_context(db: Session, passcode: str) -> Optional[Row]:
+        """
+        Get non-deleted session by passcode with its active participant count.
+        
+        Returns (session, participant_count) or None if not found.
+        """
+        participant_count = (
+            select(func.count(SessionParticipant.id))
+            .where(
+                SessionParticipant.session_id == SessionModel.id,
+                SessionParticipant.is_deleted == False
+            )
+            .scalar_subquery()
+            .label("participant_count")
+        )
+        return db.execute(
+            select(SessionModel, participant_count).where(
+                SessionModel.passcode == passcode,
+                SessionModel.is_deleted == False
+            )
+        ).first()
+
+    @staticmethod
+    def get_with_module_by_passcode(db: Session, passcode: str, module_id: int) -> Optional[Row]:
+        """
+        Get non-deleted session by passcode and session module by ID in one query.
+        
+        Returns (session, module) or None if the session is not found. module is None
+        if no module has that ID; it is not checked against the session here.
+        """
+        return db.execute(
+            select(SessionModel, SessionModule)
+            .outerjoin(SessionModule, SessionModule.id == module_id)
+            .where(
+                SessionModel.passcode == passcode,
+                SessionModel.is_deleted == False
+            )
+        ).first()
+
+    @staticmethod
+    def get_with_workspace_and_module(db: Session, session_id: int, module_id: int) -> Optional[Row]:
+        """
+        Get session by ID with its workspace and session module by ID in one query.
+        
+        Returns (session, workspace, module) or None if the session is not found.
+        workspace / module are None if missing; module is not checked against the session here.
+        """
+        return db.execute(
+            select(SessionModel, Workspace, SessionModule)
+            .outerjoin(Workspace, Workspace.id == SessionModel.workspace_id)
+            .outerjoin(SessionModule, SessionModule.id == module_id)
+            .where(SessionModel.id == session_id)
+        ).first()
+
+    @staticmethod
+    def get_passcode_bundle(
+        db: Session,
+        passcode: str,
+        guest_email: Optional[str] = None
+    ) -> Optional[Row]:
+        """
+        Get non-deleted session by passcode together with the guest verification
+        for guest_email, in one query.
+        
+        Returns (session, guest_verification_id, guest_display_name) or None if the
+        session or its workspace does not exist. Guest columns are None when
+        guest_email is None or has no verification record.
+        """
+        guest_join = (
+            GuestEmailVerification.email == guest_email
+            if guest_email is not None
+            else false()
+        )
+        return db.execute(
+            select(
+                SessionModel,
+                GuestEmailVerification.id.label("guest_verification_id"),
+                GuestEmailVerification.display_name.label("guest_display_name"),
+            )
+            .join(Workspace, Workspace.id == SessionModel.workspace_id)
+            .outerjoin(GuestEmailVerification, guest_join)
+            .where(
+                SessionModel.passcode == passcode,
+                SessionModel.is_deleted == False
+            )
+        ).first()
+    
     @staticmethod
     def get_by_workspace_id(
         db: Session,
@@ -43,6 +173,40 @@ class SessionRepository:
         
         return query.order_by(SessionModel.created_at.desc()).all()
     
+    @staticmethod
+    def name_exists(
+        db: Session,
+        workspace_id: int,
+        name: str,
+        exclude_session_id: Optional[int] = None
+    ) -> bool:
+        """
+        Check for a non-deleted session in the workspace with the same trimmed, case-insensitive name.
+        
+        Single EXISTS served by ix_sessions_workspace_normalized_name.
+        """
+        query = select(SessionModel.id).where(
+            SessionModel.workspace_id == workspace_id,
+            SessionModel.is_deleted == False,
+            func.lower(func.trim(SessionModel.name)) == name.strip().lower()
+        )
+        if exclude_session_id:
+            query = query.where(SessionModel.id != exclude_session_id)
+        return db.execute(select(query.exists())).scalar()
+    
+    @staticmethod
+    def get_normalized_names(db: Session, workspace_id: int) -> List[Row]:
+        """(id, normalized_name) of non-deleted sessions in the workspace; name is lower(trim(name))."""
+        return db.execute(
+            select(
+                SessionModel.id,
+                func.lower(func.trim(SessionModel.name)).label("normalized_name")
+            ).where(
+                SessionModel.workspace_id == workspace_id,
+                SessionModel.is_deleted == False
+            )
+        ).all()
+    
     @staticmethod
     def get_all(db: Session) -> List[SessionModel]:
         """Get all sessions."""
@@ -89,7 +253,7 @@ class SessionRepository:
         description: Optional[str] = None
     ) -> Optional[SessionModel]:
         """Update an existing session (without commit)."""
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository._get_loaded(db, session_id)
         if not session:
             return None
         
@@ -113,7 +277,7 @@ class SessionRepository:
         clear_end_datetime: bool = False
     ) -> Optional[SessionModel]:
         """Update session status (without commit)."""
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository._get_loaded(db, session_id)
         if not session:
             return None
         
@@ -128,33 +292,75 @@ class SessionRepository:
         return session
     
     @staticmethod
-    def update_stopped_participant_count(
+    def bulk_update_status_by_workspace(
         db: Session,
-        session_id: int,
-        stopped_participant_count: int
-    ) -> Optional[SessionModel]:
-        """Update session stopped participant count (without commit)."""
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
-            return None
+        workspace_id: int,
+        from_status: str,
+        to_status: str
+    ) -> int:
+        """
+        Move all non-deleted sessions of a workspace from one status to another
+        in a single UPDATE (without commit). Returns the number of sessions updated.
+        """
+        return db.query(SessionModel).filter(
+            SessionModel.workspace_id == workspace_id,
+            SessionModel.status == from_status,
+            SessionModel.is_deleted == False
+        ).update({SessionModel.status: to_status}, synchronize_session=False)
+    
+    @staticmethod
+    def start(db: Session, session_id: int) -> Optional[SessionModel]:
+        """
+        Mark session active and running in one UPDATE ... RETURNING (without commit).
         
-        session.stopped_participant_count = stopped_participant_count
-        return session
+        Keeps start_datetime from the first start, clears end_datetime and
+        stopped_participant_count. Timestamps come from the database clock (now()),
+        so start_datetime and updated_at are the same instant.
+        Returns the updated session or None if not found.
+        """
+        now = func.now()
+        return db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == session_id)
+            .values(
+                status=SessionStatus.ACTIVE.value,
+                start_datetime=func.coalesce(SessionModel.start_datetime, now),
+                end_datetime=None,
+                stopped_participant_count=0,
+                is_stopped=False,
+                updated_at=now,
+            )
+            .returning(SessionModel)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
     
     @staticmethod
-    def clear_session_run_data(
+    def stop(
         db: Session,
-        session_id: int
+        session_id: int,
+        stopped_participant_count: int
     ) -> Optional[SessionModel]:
-        """Clear end_datetime and stopped_participant_count for session restart (without commit)."""
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
-            return None
+        """
+        Mark session stopped in one UPDATE ... RETURNING (without commit); status stays ACTIVE.
         
-        session.end_datetime = None
-        session.stopped_participant_count = 0
-        session.is_stopped = False
-        return session
+        end_datetime and updated_at are set to the database now(); the
+        ck_sessions_end_after_start constraint rejects an end before start_datetime.
+        Returns the updated session or None if not found.
+        """
+        now = func.now()
+        return db.execute(
+            update(SessionModel)
+            .where(SessionModel.id == session_id)
+            .values(
+                status=SessionStatus.ACTIVE.value,
+                end_datetime=now,
+                stopped_participant_count=stopped_participant_count,
+                is_stopped=True,
+                updated_at=now,
+            )
+            .returning(SessionModel)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
     
     @staticmethod
     def update_settings(
@@ -163,7 +369,7 @@ class SessionRepository:
         new_settings: Dict[str, Any],
     ) -> Optional[SessionModel]:
         """Update session settings (full replace)."""
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository._get_loaded(db, session_id)
         if not session:
             return None
         session.settings = copy.deepcopy(new_settings) if new_settings else None
@@ -179,7 +385,7 @@ class SessionRepository:
     @staticmethod
     def soft_delete(db: Session, session_id: int) -> Optional[SessionModel]:
         """Soft delete a session (without commit)."""
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository._get_loaded(db, session_id)
         if not session or session.is_deleted:
             return None
         
@@ -189,18 +395,21 @@ class SessionRepository:
     
     @staticmethod
     def restore(db: Session, session_id: int) -> Optional[SessionModel]:
-        """Restore a soft-deleted session (without commit)."""
-        session = db.query(SessionModel).filter(
-            SessionModel.id == session_id,
-            SessionModel.is_deleted == True
-        ).first()
+        """
+        Restore a soft-deleted session in one UPDATE ... RETURNING (without commit).
         
-        if not session:
-            return None
-        
-        session.is_deleted = False
-        session.deleted_at = None
-        return session
+        Returns the restored session or None if it is not soft-deleted.
+        """
+        return db.execute(
+            update(SessionModel)
+            .where(
+                SessionModel.id == session_id,
+                SessionModel.is_deleted == True
+            )
+            .values(is_deleted=False, deleted_at=None)
+            .returning(SessionModel)
+            .execution_options(populate_existing=True)
+        ).scalar_one_or_none()
     
     @staticmethod
     def delete(db: Session, session_id: int, hard: bool = False) -> Optional[SessionModel]:
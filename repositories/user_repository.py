@@ -1,21 +1,57 @@
 """User repository."""
+import threading
 from typing import List, Optional
+from cachetools import TTLCache
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import func
+from sqlalchemy import event, func, insert, literal, select, true
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
 from models.user import User
+from models.pending_registration import PendingRegistration
 from core.config import settings
 
 
+# Narrow auth rows keyed by user id, read by token refresh. Only hits are
+# cached. Sessions that change auth fields queue the user id and the entry is
+# dropped once that transaction commits; otherwise entries expire after
+# USER_AUTH_CACHE_TTL_SECONDS. Login always reads the database so that
+# deletions and password changes apply immediately in every worker.
+_auth_cache: TTLCache = TTLCache(
+    maxsize=settings.USER_AUTH_CACHE_MAX_SIZE,
+    ttl=max(settings.USER_AUTH_CACHE_TTL_SECONDS, 1),
+)
+_auth_cache_lock = threading.Lock()
+_AUTH_CACHE_ENABLED = settings.USER_AUTH_CACHE_TTL_SECONDS > 0
+_PENDING_AUTH_INVALIDATIONS = "pending_auth_cache_invalidations"
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_auth_rows(session: Session) -> None:
+    """Drop cached auth rows of users whose auth fields were just committed."""
+    user_ids = session.info.pop(_PENDING_AUTH_INVALIDATIONS, None)
+    if not user_ids:
+        return
+    with _auth_cache_lock:
+        for user_id in user_ids:
+            _auth_cache.pop(user_id, None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_auth_invalidations(session: Session) -> None:
+    """Rolled back changes leave the cached rows valid."""
+    session.info.pop(_PENDING_AUTH_INVALIDATIONS, None)
+
+
 class UserRepository:
     """Repository for user operations."""
     
     @staticmethod
     def get_by_id(db: Session, user_id: int) -> Optional[User]:
-        """Get user by ID."""
-        return db.query(User).filter(
-            User.id == user_id
-        ).first()
+        """
+        Get user by ID. Served from the identity map when the user was already
+        loaded through this (request-scoped) session, e.g. by get_current_user.
+        """
+        return db.get(User, user_id)
     
     @staticmethod
     def get_by_email(db: Session, email: str) -> Optional[User]:
@@ -25,6 +61,45 @@ class UserRepository:
             User.is_deleted == False
         ).first()
     
+    @staticmethod
+    def get_auth_by_email(db: Session, email: str) -> Optional[Row]:
+        """Get (id, email, password_hash, email_verified) by email (case-insensitive)."""
+        return db.execute(
+            select(User.id, User.email, User.password_hash, User.email_verified).where(
+                func.lower(User.email) == func.lower(email),
+                User.is_deleted == False
+            )
+        ).first()
+    
+    @staticmethod
+    def get_auth_by_id(db: Session, user_id: int) -> Optional[Row]:
+        """Get (id, email, password_hash, email_verified) by ID."""
+        return db.execute(
+            select(User.id, User.email, User.password_hash, User.email_verified).where(
+                User.id == user_id
+            )
+        ).first()
+    
+    @staticmethod
+    def get_auth_by_id_cached(db: Session, user_id: int) -> Optional[Row]:
+        """Read-through cached get_auth_by_id."""
+        if not _AUTH_CACHE_ENABLED:
+            return UserRepository.get_auth_by_id(db, user_id)
+        with _auth_cache_lock:
+            row = _auth_cache.get(user_id)
+        if row is None:
+            row = UserRepository.get_auth_by_id(db, user_id)
+            if row is not None:
+                with _auth_cache_lock:
+                    _auth_cache[user_id] = row
+        return row
+    
+    @staticmethod
+    def invalidate_auth_cache(db: Session, user_id: int) -> None:
+        """Drop the cached auth row of user_id once db's current transaction commits."""
+        if _AUTH_CACHE_ENABLED:
+            db.info.setdefault(_PENDING_AUTH_INVALIDATIONS, set()).add(user_id)
+    
     @staticmethod
     def get_all(db: Session) -> List[User]:
         """Get all users."""
@@ -55,6 +130,51 @@ class UserRepository:
         db.add(user)
         return user
     
+    @staticmethod
+    def create_from_pending_registration(
+        db: Session,
+        email: str,
+        code: str,
+        now: datetime
+    ) -> Optional[Row]:
+        """
+        Create verified user from a matching, unexpired pending registration (without commit).
+        
+        Single INSERT ... SELECT, so an expired code can never create a user.
+        Returns (id, email) of the created user or None if nothing matched.
+        """
+        source = select(
+            PendingRegistration.email,
+            PendingRegistration.password_hash,
+            PendingRegistration.first_name,
+            PendingRegistration.last_name,
+            true(),
+            literal(False),
+            literal(now),
+            literal(now),
+        ).where(
+            func.lower(PendingRegistration.email) == func.lower(email),
+            PendingRegistration.verification_code == code,
+            PendingRegistration.verification_code_expires_at > now
+        )
+        return db.execute(
+            insert(User)
+            .from_select(
+                [
+                    User.email,
+                    User.password_hash,
+                    User.first_name,
+                    User.last_name,
+                    User.email_verified,
+                    User.is_deleted,
+                    User.created_at,
+                    User.updated_at,
+                ],
+                source,
+            )
+            .returning(User.id, User.email)
+        ).first()
+    
     @staticmethod
     def update(
         db: Session,
@@ -88,6 +208,17 @@ class UserRepository:
 
         return user if updated else None
     
+    @staticmethod
+    def update_password_hash(db: Session, user_id: int, password_hash: str) -> Optional[User]:
+        """Replace stored password hash (without commit)."""
+        user = UserRepository.get_by_id(db, user_id)
+        if not user:
+            return None
+        
+        UserRepository.invalidate_auth_cache(db, user.id)
+        user.password_hash = password_hash
+        return user
+    
     @staticmethod
     def verify_email(db: Session, user_id: int) -> Optional[User]:
         """Mark user email as verified (without commit)."""
@@ -95,6 +226,7 @@ class UserRepository:
         if not user:
             return None
         
+        UserRepository.invalidate_auth_cache(db, user.id)
         user.email_verified = True
         user.verification_code = None
         user.verification_code_expires_at = None
@@ -112,6 +244,7 @@ class UserRepository:
         if not user:
             return None
         
+        UserRepository.invalidate_auth_cache(db, user.id)
         user.verification_code = verification_code
         user.verification_code_expires_at = verification_code_expires_at
         return user
@@ -123,6 +256,7 @@ class UserRepository:
         if not user or user.is_deleted:
             return None
         
+        UserRepository.invalidate_auth_cache(db, user.id)
         user.is_deleted = True
         user.deleted_at = datetime.now(timezone.utc)
         return user
@@ -138,5 +272,6 @@ class UserRepository:
         if not user:
             return None
         
+        UserRepository.invalidate_auth_cache(db, user.id)
         db.delete(user)
         return user
@@ -1,18 +1,47 @@
 """Authentication service."""
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Tuple
+from typing import Optional, Tuple
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from repositories.user_repository import UserRepository
 from repositories.pending_registration_repository import PendingRegistrationRepository
 from repositories.refresh_token_repository import RefreshTokenRepository
-from utils.password import hash_password, verify_password
-from utils.email import generate_verification_code, send_verification_email
+from utils.password import hash_password, verify_password, verify_password_cached, password_needs_rehash
+from utils.email import generate_verification_code
+from utils.email_pool import SMTP_CONFIGURED, queue_verification_email
 from core.auth import create_access_token, create_refresh_token
 from core.config import settings
+import logging
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+# Verified against when the user does not exist so that login timing
+# does not reveal whether an email is registered.
+_DUMMY_PASSWORD_HASH = hash_password("x" * 32)
+
+_ACCESS_TTL = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_TTL = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+_VERIFICATION_CODE_TTL = timedelta(minutes=settings.VERIFICATION_CODE_EXPIRE_MINUTES)
+
+
+@dataclass(slots=True)
+class AuthTokenResult:
+    """Access token issued by verify_email / login / refresh_access_token."""
+    access_token: str
+    user_id: int
+    email: str
+    token_type: str = "bearer"
+
+
+@dataclass(slots=True)
+class VerificationCodeResult:
+    """Outcome of sending a verification code (code only when SMTP is not configured)."""
+    verification_code_sent: bool
+    email: Optional[str] = None
+    code: Optional[str] = None
+
 
 class AuthService:
     """Service for authentication operations."""
@@ -24,7 +53,7 @@ class AuthService:
         password: str,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
-    ) -> Dict[str, any]:
+    ) -> VerificationCodeResult:
         """
         Register a new user (pending registration until email verified).
         
@@ -34,30 +63,21 @@ class AuthService:
             password: User password
         
         Returns:
-            Dict with email and verification_code_sent status
+            VerificationCodeResult with email and verification_code_sent status
         
         Raises:
             ValueError: If email already exists (in users or pending registrations)
         """
-        # Check if user already exists in users table
-        existing_user = UserRepository.get_by_email(db, email)
-        if existing_user:
-            raise ValueError(f"User with email {email} already exists")
-        
-        # Check if pending registration already exists
-        existing_pending = PendingRegistrationRepository.get_by_email(db, email)
-        if existing_pending:
-            raise ValueError(f"Registration with email {email} is already pending. Please verify your email or wait for the code to expire.")
-        
         # Hash password
         password_hash = hash_password(password)
         
         # Generate verification code
         verification_code = generate_verification_code()
-        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.VERIFICATION_CODE_EXPIRE_MINUTES)
+        expires_at = datetime.now(timezone.utc) + _VERIFICATION_CODE_TTL
         
-        # Create pending registration (not in users table yet)
-        pending_reg = PendingRegistrationRepository.create(
+        # Create pending registration (not in users table yet); the insert is
+        # skipped when the email belongs to a user or another pending registration
+        pending_reg_id = PendingRegistrationRepository.create(
             db=db,
             email=email,
             password_hash=password_hash,
@@ -66,33 +86,36 @@ class AuthService:
             verification_code=verification_code,
             verification_code_expires_at=expires_at
         )
+        if pending_reg_id is None:
+            if UserRepository.get_auth_by_email(db, email):
+                raise ValueError(f"User with email {email} already exists")
+            raise ValueError(f"Registration with email {email} is already pending. Please verify your email or wait for the code to expire.")
         
-        # Send verification email
-        email_sent = send_verification_email(email, verification_code)
+        # Queue verification email (delivered by background sender)
+        email_sent = queue_verification_email(email, verification_code)
         if not email_sent:
-            raise ValueError(
-                "Could not send verification email. This email address may be unavailable "
-                "or the domain does not accept mail."
+            raise ValueError("Could not send verification email. Please try again later.")
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "pending_registration_created",
+                pending_reg_id=pending_reg_id,
+                email=email,
+                email_sent=email_sent
             )
 
-        logger.info(
-            "pending_registration_created",
-            pending_reg_id=pending_reg.id,
+        return VerificationCodeResult(
+            verification_code_sent=email_sent,
             email=email,
-            email_sent=email_sent
+            code=None if SMTP_CONFIGURED else verification_code,
         )
-
-        result = {"email": email, "verification_code_sent": email_sent}
-        if not all([settings.SMTP_HOST, settings.SMTP_USER, settings.SMTP_PASSWORD, settings.SMTP_FROM_EMAIL]):
-            result["code"] = verification_code
-        return result
     
     @staticmethod
     def verify_email(
         db: Session,
         email: str,
         code: str
-    ) -> Dict[str, any]:
+    ) -> AuthTokenResult:
         """
         Verify user email with code and create user in users table.
         
@@ -102,67 +125,57 @@ class AuthService:
             code: Verification code
         
         Returns:
-            Dict with success status and access token
+            AuthTokenResult with access token
         
         Raises:
             ValueError: If pending registration not found, code invalid, or expired
         """
-        # Get pending registration
-        pending_reg = PendingRegistrationRepository.get_by_email_and_code(db, email, code)
-        if not pending_reg:
+        now = datetime.now(timezone.utc)
+        
+        # Create verified user straight from the pending registration; expired
+        # or mismatching codes simply match no row
+        try:
+            user = UserRepository.create_from_pending_registration(db, email, code, now)
+            if user:
+                PendingRegistrationRepository.discard_by_email(db, email)
+                db.commit()
+        except IntegrityError:
+            # Concurrent verification already created the user
+            db.rollback()
+            raise ValueError("Email already verified")
+        
+        if not user:
+            pending_reg = PendingRegistrationRepository.get_by_email_and_code(db, email, code)
+            if pending_reg:
+                raise ValueError("Verification code expired")
             # Check if user already exists (already verified)
-            existing_user = UserRepository.get_by_email(db, email)
+            existing_user = UserRepository.get_auth_by_email(db, email)
             if existing_user and existing_user.email_verified:
                 raise ValueError("Email already verified")
             raise ValueError("Invalid verification code or email not found")
         
-        # Check expiration
-        if pending_reg.verification_code_expires_at < datetime.now(timezone.utc):
-            raise ValueError("Verification code expired")
-        
-        # Create user in users table (email is now verified)
-        user = UserRepository.create(
-            db=db,
-            email=pending_reg.email,
-            password_hash=pending_reg.password_hash,
-            first_name=pending_reg.first_name,
-            last_name=pending_reg.last_name,
-            verification_code=None,  # No longer needed
-            verification_code_expires_at=None
-        )
-        
-        # Mark email as verified immediately
-        user.email_verified = True
-        
-        # Commit user creation
-        db.commit()
-        db.refresh(user)
-        
-        # Delete pending registration
-        PendingRegistrationRepository.delete(db, pending_reg.id)
-        
         # Generate access token
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": user.id},
-            expires_delta=access_token_expires
+            expires_delta=_ACCESS_TTL,
+            now=now
         )
         
-        logger.info("email_verified", user_id=user.id, email=email)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("email_verified", user_id=user.id, email=email)
         
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user_id": user.id,
-            "email": user.email
-        }
+        return AuthTokenResult(
+            access_token=access_token,
+            user_id=user.id,
+            email=user.email,
+        )
     
     @staticmethod
     def login(
         db: Session,
         email: str,
         password: str
-    ) -> Tuple[Dict[str, any], str, datetime]:
+    ) -> Tuple[AuthTokenResult, str, datetime]:
         """
         Login user with email and password.
         
@@ -172,33 +185,41 @@ class AuthService:
             password: User password
         
         Returns:
-            Tuple of (response dict, refresh_token, expires_at)
+            Tuple of (AuthTokenResult, refresh_token, expires_at)
         
         Raises:
             ValueError: If credentials invalid or email not verified
         """
-        user = UserRepository.get_by_email(db, email)
+        user = UserRepository.get_auth_by_email(db, email)
         if not user:
+            verify_password(password, _DUMMY_PASSWORD_HASH)
             raise ValueError("Invalid email or password")
         
         # Verify password
-        if not verify_password(password, user.password_hash):
+        if not verify_password_cached(password, user.id, user.password_hash):
             raise ValueError("Invalid email or password")
         
+        # Transparently upgrade legacy bcrypt / outdated argon2 hashes;
+        # committed together with the refresh token below
+        if password_needs_rehash(user.password_hash):
+            UserRepository.update_password_hash(db, user.id, hash_password(password))
+        
         # Check if email is verified
         if not user.email_verified:
             raise ValueError("Email not verified. Please verify your email first.")
         
+        now = datetime.now(timezone.utc)
+        
         # Generate access token
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": user.id},
-            expires_delta=access_token_expires
+            expires_delta=_ACCESS_TTL,
+            now=now
         )
         
         # Generate refresh token
         refresh_token_str = create_refresh_token(user.id)
-        refresh_token_expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        refresh_token_expires_at = now + _REFRESH_TTL
         
         # Store refresh token in database
         RefreshTokenRepository.create(
@@ -208,14 +229,14 @@ class AuthService:
             expires_at=refresh_token_expires_at
         )
         
-        logger.info("user_logged_in", user_id=user.id, email=email)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("user_logged_in", user_id=user.id, email=email)
         
-        response = {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user_id": user.id,
-            "email": user.email
-        }
+        response = AuthTokenResult(
+            access_token=access_token,
+            user_id=user.id,
+            email=user.email,
+        )
         
         return response, refresh_token_str, refresh_token_expires_at
     
@@ -223,7 +244,7 @@ class AuthService:
     def resend_verification_code(
         db: Session,
         email: str
-    ) -> Dict[str, any]:
+    ) -> VerificationCodeResult:
         """
         Resend verification code to user email.
         
@@ -232,13 +253,13 @@ class AuthService:
             email: User email
         
         Returns:
-            Dict with verification_code_sent status
+            VerificationCodeResult with verification_code_sent status
         
         Raises:
             ValueError: If pending registration not found or email already verified
         """
         # Check if user already exists and verified
-        existing_user = UserRepository.get_by_email(db, email)
+        existing_user = UserRepository.get_auth_by_email(db, email)
         if existing_user and existing_user.email_verified:
             raise ValueError("Email already verified")
         
@@ -249,7 +270,7 @@ class AuthService:
         
         # Generate new verification code
         verification_code = generate_verification_code()
-        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.VERIFICATION_CODE_EXPIRE_MINUTES)
+        expires_at = datetime.now(timezone.utc) + _VERIFICATION_CODE_TTL
         
         # Update verification code in pending registration
         PendingRegistrationRepository.update_verification_code(
@@ -259,26 +280,24 @@ class AuthService:
             verification_code_expires_at=expires_at
         )
         
-        # Send verification email
-        email_sent = send_verification_email(email, verification_code)
+        # Queue verification email (delivered by background sender)
+        email_sent = queue_verification_email(email, verification_code)
         if not email_sent:
-            raise ValueError(
-                "Could not send verification email. This email address may be unavailable "
-                "or the domain does not accept mail."
-            )
+            raise ValueError("Could not send verification email. Please try again later.")
 
-        logger.info("verification_code_resent", pending_reg_id=pending_reg.id, email=email, email_sent=email_sent)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("verification_code_resent", pending_reg_id=pending_reg.id, email=email, email_sent=email_sent)
 
-        result = {"verification_code_sent": email_sent}
-        if not all([settings.SMTP_HOST, settings.SMTP_USER, settings.SMTP_PASSWORD, settings.SMTP_FROM_EMAIL]):
-            result["code"] = verification_code
-        return result
+        return VerificationCodeResult(
+            verification_code_sent=email_sent,
+            code=None if SMTP_CONFIGURED else verification_code,
+        )
     
     @staticmethod
     def refresh_access_token(
         db: Session,
         refresh_token: str
-    ) -> Tuple[Dict[str, any], Optional[str], Optional[datetime]]:
+    ) -> Tuple[AuthTokenResult, Optional[str], Optional[datetime]]:
         """
         Refresh access token using refresh token.
         
@@ -287,60 +306,52 @@ class AuthService:
             refresh_token: Refresh token string
         
         Returns:
-            Tuple of (response dict, new_refresh_token, expires_at) or (None, None, None) if invalid
+            Tuple of (AuthTokenResult, new_refresh_token, expires_at) or (None, None, None) if invalid
         
         Raises:
             ValueError: If refresh token invalid, expired, or revoked
         """
-        # Get refresh token from database
-        token_record = RefreshTokenRepository.get_by_token(db, refresh_token)
-        if not token_record:
-            raise ValueError("Invalid refresh token")
+        now = datetime.now(timezone.utc)
+        new_refresh_token_str = create_refresh_token()
+        new_refresh_token_expires_at = now + _REFRESH_TTL
         
-        # Check if token is expired
-        if token_record.expires_at < datetime.now(timezone.utc):
-            raise ValueError("Refresh token expired")
-        
-        # Check if token is revoked
-        if token_record.revoked:
-            raise ValueError("Refresh token revoked")
+        # Rotate in place only if the token is still active; committed below
+        user_id = RefreshTokenRepository.rotate(
+            db=db,
+            old_token=refresh_token,
+            new_token=new_refresh_token_str,
+            new_expires_at=new_refresh_token_expires_at,
+            now=now
+        )
+        if user_id is None:
+            token_record = RefreshTokenRepository.get_by_token(db, refresh_token)
+            if token_record and token_record.expires_at <= now:
+                raise ValueError("Refresh token expired")
+            raise ValueError("Invalid refresh token")
         
         # Get user
-        user = UserRepository.get_by_id(db, token_record.user_id)
+        user = UserRepository.get_auth_by_id_cached(db, user_id)
         if not user or not user.email_verified:
             raise ValueError("User not found or email not verified")
         
+        db.commit()
+        
         # Generate new access token
-        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
             data={"sub": user.id},
-            expires_delta=access_token_expires
+            expires_delta=_ACCESS_TTL,
+            now=now
         )
         
-        # Optionally rotate refresh token (create new one and revoke old)
-        new_refresh_token_str = create_refresh_token(user.id)
-        new_refresh_token_expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("token_refreshed", user_id=user.id)
         
-        # Revoke old token
-        RefreshTokenRepository.revoke_token(db, refresh_token)
-        
-        # Create new refresh token
-        RefreshTokenRepository.create(
-            db=db,
+        response = AuthTokenResult(
+            access_token=access_token,
             user_id=user.id,
-            token=new_refresh_token_str,
-            expires_at=new_refresh_token_expires_at
+            email=user.email,
         )
         
-        logger.info("token_refreshed", user_id=user.id)
-        
-        response = {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user_id": user.id,
-            "email": user.email
-        }
-        
         return response, new_refresh_token_str, new_refresh_token_expires_at
     
     @staticmethod
@@ -360,5 +371,6 @@ class AuthService:
         """
         revoked = RefreshTokenRepository.revoke_token(db, refresh_token)
         if revoked:
-            logger.info("user_logged_out", refresh_token=refresh_token[:10] + "...")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("user_logged_out", refresh_token=refresh_token[:10] + "...")
         return revoked
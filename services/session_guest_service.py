@@ -1,17 +1,20 @@
 """Service for guest join by passcode (email-code flow)."""
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Tuple
 
 from sqlalchemy.orm import Session as DBSession
 
 from core.config import settings
-from core.auth import create_guest_access_token
+from core.auth import create_guest_access_token, verify_token
 from repositories.session_repository import SessionRepository
 from repositories.workspace_repository import WorkspaceRepository
 from repositories.guest_email_verification_repository import GuestEmailVerificationRepository
 from repositories.session_pending_email_code_repository import SessionPendingEmailCodeRepository
 from services.session_participant_service import SessionParticipantService
-from utils.email import generate_verification_code, send_verification_email
+from utils.email import generate_verification_code
+from utils.email_pool import SMTP_CONFIGURED, queue_verification_email
+import logging
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -25,6 +28,12 @@ def _email_domain(email: str) -> str:
     return email.split("@")[-1].lower() if "@" in email else ""
 
 
+@lru_cache(maxsize=256)
+def _normalized_whitelist(whitelist: Tuple[str, ...]) -> FrozenSet[str]:
+    """Lower-cased, stripped whitelist domains; memoized per distinct whitelist."""
+    return frozenset(d.strip().lower() for d in whitelist if d.strip())
+
+
 def _email_domain_allowed(email: str, merged_settings: Dict[str, Any]) -> bool:
     """Check if email domain is in whitelist. Empty/None whitelist = any domain."""
     domain = _email_domain(email)
@@ -33,7 +42,18 @@ def _email_domain_allowed(email: str, merged_settings: Dict[str, Any]) -> bool:
     whitelist = merged_settings.get("email_code_domains_whitelist")
     if not whitelist or (isinstance(whitelist, list) and len(whitelist) == 0):
         return True
-    return domain in [d.strip().lower() for d in whitelist if isinstance(d, str) and d.strip()]
+    return domain in _normalized_whitelist(tuple(d for d in whitelist if isinstance(d, str)))
+
+
+def _guest_email_from_token(token: str) -> Optional[str]:
+    """Normalized email from a valid session_guest JWT, else None."""
+    payload = verify_token(token)
+    if not payload or payload.get("type") != "session_guest":
+        return None
+    email = payload.get("sub")
+    if not email or not isinstance(email, str):
+        return None
+    return _normalize_email(email)
 
 
 class SessionGuestService:
@@ -51,12 +71,13 @@ class SessionGuestService:
         adds guest_authenticated=True so frontend can skip the form and use stored token.
         Raises ValueError if passcode not found or session deleted.
         """
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
-            raise ValueError("Session not found")
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace:
+        # Token is decoded first (no DB) so the verification row can be fetched
+        # in the same query as the session and workspace
+        guest_email = _guest_email_from_token(guest_token) if guest_token else None
+        bundle = SessionRepository.get_passcode_bundle(db, passcode, guest_email)
+        if not bundle:
             raise ValueError("Session not found")
+        session, guest_verification_id, guest_display_name = bundle
         merged = SessionRepository.get_settings(session)
         result = {
             "id": session.id,
@@ -66,14 +87,15 @@ class SessionGuestService:
             "email_code_domains_whitelist": merged.get("email_code_domains_whitelist") or [],
             "sso_organization_id": merged.get("sso_organization_id"),
         }
-        if guest_token and merged.get("participant_entry_mode") == "email_code":
-            guest_info = SessionGuestService._validate_guest_token_for_session(
-                db, guest_token, merged
-            )
-            if guest_info:
-                result["guest_authenticated"] = True
-                result["email"] = guest_info["email"]
-                result["display_name"] = guest_info.get("display_name")
+        if (
+            guest_email
+            and guest_verification_id is not None
+            and merged.get("participant_entry_mode") == "email_code"
+            and _email_domain_allowed(guest_email, merged)
+        ):
+            result["guest_authenticated"] = True
+            result["email"] = guest_email
+            result["display_name"] = guest_display_name
         if not result.get("guest_authenticated") and guest_token:
             try:
                 participant, _ = SessionParticipantService.resolve_participant(
@@ -86,29 +108,6 @@ class SessionGuestService:
                 pass
         return result
 
-    @staticmethod
-    def _validate_guest_token_for_session(
-        db: DBSession,
-        token: str,
-        merged_settings: Dict[str, Any],
-    ) -> Optional[Dict[str, Any]]:
-        """If token is valid guest JWT and email domain in whitelist, return {email, display_name}."""
-        from core.auth import verify_token
-
-        payload = verify_token(token)
-        if not payload or payload.get("type") != "session_guest":
-            return None
-        email = payload.get("sub")
-        if not email or not isinstance(email, str):
-            return None
-        email = _normalize_email(email)
-        if not _email_domain_allowed(email, merged_settings):
-            return None
-        verification = GuestEmailVerificationRepository.get_by_email(db, email)
-        if not verification:
-            return None
-        return {"email": email, "display_name": verification.display_name}
-
     @staticmethod
     def request_code(
         db: DBSession,
@@ -141,25 +140,20 @@ class SessionGuestService:
         SessionPendingEmailCodeRepository.create_or_update(
             db, session.id, email, code, expires_at
         )
-        email_sent = send_verification_email(email, code)
         db.commit()
-
-        logger.info(
-            "session_guest_code_requested",
-            session_id=session.id,
-            email_domain=_email_domain(email),
-            email_sent=email_sent,
-        )
+        # Queued only after commit so the code is valid once the email goes out
+        email_sent = queue_verification_email(email, code)
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "session_guest_code_requested",
+                session_id=session.id,
+                email_domain=_email_domain(email),
+                email_sent=email_sent,
+            )
 
         result = {"verification_code_sent": email_sent}
-        if not all(
-            [
-                settings.SMTP_HOST,
-                settings.SMTP_USER,
-                settings.SMTP_PASSWORD,
-                settings.SMTP_FROM_EMAIL,
-            ]
-        ):
+        if not SMTP_CONFIGURED:
             result["code"] = code
         return result
 
@@ -175,30 +169,30 @@ class SessionGuestService:
         Verify code and issue guest token. Commits on success.
         """
         email = _normalize_email(email)
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
-            raise ValueError("Session not found")
 
-        pending = SessionPendingEmailCodeRepository.get_by_session_email_code(
-            db, session.id, email, code
-        )
-        if not pending:
+        # Codes are single-use: the pending record is removed whether or not it
+        # expired. Session lookup is folded into the same DELETE.
+        consumed = SessionPendingEmailCodeRepository.consume_by_passcode(db, passcode, email, code)
+        if consumed is None:
+            if not SessionRepository.get_by_passcode(db, passcode):
+                raise ValueError("Session not found")
             raise ValueError("Invalid verification code or email not found")
-        if pending.expires_at < datetime.now(timezone.utc):
-            SessionPendingEmailCodeRepository.delete(db, pending)
+        session_id, expires_at = consumed
+        now = datetime.now(timezone.utc)
+        if expires_at < now:
             db.commit()
             raise ValueError("Verification code expired")
 
-        SessionPendingEmailCodeRepository.delete(db, pending)
         GuestEmailVerificationRepository.upsert(db, email, display_name or None)
-        token = create_guest_access_token(email)
+        token = create_guest_access_token(email, now=now)
         db.commit()
 
-        logger.info(
-            "session_guest_verified",
-            session_id=session.id,
-            email_domain=_email_domain(email),
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "session_guest_verified",
+                session_id=session_id,
+                email_domain=_email_domain(email),
+            )
 
         return {
             "access_token": token,
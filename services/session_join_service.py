@@ -1,5 +1,8 @@
 """Service for session join (all entry modes)."""
+import base64
 import hashlib
+import logging
+import os
 import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
@@ -11,9 +14,7 @@ from core.config import settings as app_settings
 from models.session_participant import ParticipantType
 from repositories.session_repository import SessionRepository
 from repositories.session_participant_repository import SessionParticipantRepository
-from repositories.guest_email_verification_repository import GuestEmailVerificationRepository
 from repositories.session_join_fingerprint_repository import SessionJoinFingerprintRepository
-from repositories.user_repository import UserRepository
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -23,8 +24,25 @@ def _normalize_email(email: str) -> str:
     return email.strip().lower()
 
 
+# Fingerprint digests are dedup keys, not credentials: keyed BLAKE2s-128 is
+# faster than SHA-256 and halves the indexed column, while the key keeps
+# stored values from being matched against guessed fingerprints.
+_FINGERPRINT_KEY = hashlib.sha256(
+    (app_settings.SESSION_JOIN_FINGERPRINT_KEY or "join-fingerprint:" + app_settings.SECRET_KEY).encode("utf-8")
+).digest()
+
+
+_ANON_TYPE = ParticipantType.ANONYMOUS.value
+_USER_TYPE = ParticipantType.USER.value
+_GUEST_TYPE = ParticipantType.GUEST_EMAIL.value
+_ANON_SLUG_PREFIX = app_settings.ANONYMOUS_SLUG_PREFIX
+_ANON_DISPLAY_NAME_PREFIX = app_settings.ANONYMOUS_DISPLAY_NAME_PREFIX
+_FINGERPRINT_WINDOW = timedelta(hours=app_settings.PARTICIPANT_TOKEN_EXPIRE_HOURS)
+
+
 def _generate_anonymous_slug() -> str:
-    return app_settings.ANONYMOUS_SLUG_PREFIX + secrets.token_hex(8)
+    # 72 random bits in 12 URL-safe characters (hex needs 18)
+    return _ANON_SLUG_PREFIX + base64.urlsafe_b64encode(os.urandom(9)).decode("ascii")
 
 
 class SessionJoinService:
@@ -41,12 +59,10 @@ class SessionJoinService:
             raise ValueError(f"Session is not in {expected} entry mode (current: {mode})")
 
     @staticmethod
-    def _check_max_participants(db: DBSession, session_id: int, merged: Dict[str, Any]) -> None:
+    def _check_max_participants(participant_count: int, merged: Dict[str, Any]) -> None:
         max_p = merged.get("max_participants")
-        if max_p is not None:
-            count = len(SessionParticipantRepository.get_by_session_id(db, session_id))
-            if count >= max_p:
-                raise ValueError("Maximum participants reached")
+        if max_p is not None and participant_count >= max_p:
+            raise ValueError("Maximum participants reached")
 
     @staticmethod
     def _check_session_started(session) -> None:
@@ -58,49 +74,34 @@ class SessionJoinService:
         value = (fingerprint or "").strip()
         if not value:
             raise ValueError("Fingerprint is required")
-        return hashlib.sha256(value.encode("utf-8")).hexdigest()
+        return hashlib.blake2s(value.encode("utf-8"), digest_size=16, key=_FINGERPRINT_KEY).hexdigest()
 
     @staticmethod
-    def _enforce_fingerprint_limit(
+    def _record_fingerprint_join(
         db: DBSession,
         session_id: int,
-        fingerprint: str,
+        fingerprint_hash: str,
         entry_type: str,
+        participant_id: int,
+        now: datetime,
     ) -> None:
-        fingerprint_hash = SessionJoinService._hash_fingerprint(fingerprint)
-        window_start = datetime.now(timezone.utc) - timedelta(
-            hours=app_settings.PARTICIPANT_TOKEN_EXPIRE_HOURS
-        )
-        recent_count = SessionJoinFingerprintRepository.count_since(
+        """Record join for fingerprint; roll back and raise if the device limit was already reached."""
+        window_start = now - _FINGERPRINT_WINDOW
+        recent_count = SessionJoinFingerprintRepository.create_and_count_since(
             db=db,
             session_id=session_id,
             fingerprint_hash=fingerprint_hash,
             entry_type=entry_type,
             created_after=window_start,
+            participant_id=participant_id,
         )
         if recent_count >= app_settings.SESSION_JOIN_FINGERPRINT_LIMIT:
+            db.rollback()
             raise ValueError(
                 "Превышен лимит входов с этого устройства для этой сессии. "
                 "Попробуйте позже или используйте другой способ входа."
             )
 
-    @staticmethod
-    def _track_fingerprint_join(
-        db: DBSession,
-        session_id: int,
-        fingerprint: str,
-        entry_type: str,
-        participant_id: int,
-    ) -> None:
-        fingerprint_hash = SessionJoinService._hash_fingerprint(fingerprint)
-        SessionJoinFingerprintRepository.create(
-            db=db,
-            session_id=session_id,
-            participant_id=participant_id,
-            fingerprint_hash=fingerprint_hash,
-            entry_type=entry_type,
-        )
-
     @staticmethod
     def join_anonymous(
         db: DBSession,
@@ -109,42 +110,40 @@ class SessionJoinService:
         display_name: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Create anonymous participant, return participant_token. Commits."""
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
+        fingerprint_hash = SessionJoinService._hash_fingerprint(fingerprint)
+        now = datetime.now(timezone.utc)
+        context = SessionRepository.get_join_context(db, passcode)
+        if not context:
             raise ValueError("Session not found")
+        session, participant_count = context
         SessionJoinService._check_session_started(session)
         merged = SessionJoinService._get_session_settings(session)
         SessionJoinService._check_entry_mode(merged, "anonymous")
-        SessionJoinService._check_max_participants(db, session.id, merged)
-        SessionJoinService._enforce_fingerprint_limit(
-            db=db,
-            session_id=session.id,
-            fingerprint=fingerprint,
-            entry_type="anonymous",
-        )
+        SessionJoinService._check_max_participants(participant_count, merged)
 
         slug = _generate_anonymous_slug()
-        disp = (display_name or "").strip() or f"{app_settings.ANONYMOUS_DISPLAY_NAME_PREFIX}{secrets.token_hex(4)[:4]}"
+        disp = (display_name or "").strip() or f"{_ANON_DISPLAY_NAME_PREFIX}{secrets.token_hex(2)}"
         participant = SessionParticipantRepository.create(
             db,
             session_id=session.id,
-            participant_type=ParticipantType.ANONYMOUS.value,
+            participant_type=_ANON_TYPE,
             display_name=disp,
             anonymous_slug=slug,
         )
         db.flush()
-        SessionJoinService._track_fingerprint_join(
+        SessionJoinService._record_fingerprint_join(
             db=db,
             session_id=session.id,
-            fingerprint=fingerprint,
+            fingerprint_hash=fingerprint_hash,
             entry_type="anonymous",
             participant_id=participant.id,
+            now=now,
         )
         db.commit()
-        db.refresh(participant)
 
-        token = create_participant_token(participant.id, session.id)
-        logger.info("session_join_anonymous", session_id=session.id, participant_id=participant.id)
+        token = create_participant_token(participant.id, session.id, now=now)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_join_anonymous", session_id=session.id, participant_id=participant.id)
         return {
             "participant_token": token,
             "token_type": "bearer",
@@ -156,38 +155,51 @@ class SessionJoinService:
     @staticmethod
     def join_registered(db: DBSession, passcode: str, user_id: int) -> Dict[str, Any]:
         """Create or get participant for registered user. Commits if created."""
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
+        context = SessionRepository.get_join_context(db, passcode)
+        if not context:
             raise ValueError("Session not found")
+        session, participant_count = context
         SessionJoinService._check_session_started(session)
         merged = SessionJoinService._get_session_settings(session)
         SessionJoinService._check_entry_mode(merged, "registered")
 
-        user = UserRepository.get_by_id(db, user_id)
+        # User and existing participant are independent lookups; one round trip
+        user = SessionParticipantRepository.get_user_join_info(db, session.id, user_id)
         if not user:
             raise ValueError("User not found")
         disp = (user.first_name or "").strip() or (user.last_name or "").strip() or user.email or None
 
-        existing = SessionParticipantRepository.get_by_session_and_user(db, session.id, user_id)
-        if existing:
-            logger.info("session_join_registered_existing", session_id=session.id, participant_id=existing.id)
+        if user.participant_id is not None:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("session_join_registered_existing", session_id=session.id, participant_id=user.participant_id)
             return {
-                "participant_id": existing.id,
+                "participant_id": user.participant_id,
                 "session_id": session.id,
-                "display_name": existing.display_name or disp,
+                "display_name": user.participant_display_name or disp,
             }
 
-        SessionJoinService._check_max_participants(db, session.id, merged)
-        participant = SessionParticipantRepository.create(
+        SessionJoinService._check_max_participants(participant_count, merged)
+        participant = SessionParticipantRepository.create_if_absent(
             db,
             session_id=session.id,
-            participant_type=ParticipantType.USER.value,
-            user_id=user_id,
+            participant_type=_USER_TYPE,
             display_name=disp,
+            user_id=user_id,
         )
+        if participant is None:
+            # A concurrent join created it first
+            db.rollback()
+            existing = SessionParticipantRepository.get_by_session_and_user(db, session.id, user_id)
+            if not existing:
+                raise ValueError("Could not join session. Please try again.")
+            return {
+                "participant_id": existing.id,
+                "session_id": session.id,
+                "display_name": existing.display_name or disp,
+            }
         db.commit()
-        db.refresh(participant)
-        logger.info("session_join_registered", session_id=session.id, participant_id=participant.id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_join_registered", session_id=session.id, participant_id=participant.id)
         return {
             "participant_id": participant.id,
             "session_id": session.id,
@@ -198,51 +210,60 @@ class SessionJoinService:
     def join_guest(db: DBSession, passcode: str, email: str, fingerprint: str) -> Dict[str, Any]:
         """Create or get participant for email-code guest. Commits if created."""
         email = _normalize_email(email)
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
+        context = SessionRepository.get_join_context(db, passcode)
+        if not context:
             raise ValueError("Session not found")
+        session, participant_count = context
         SessionJoinService._check_session_started(session)
         merged = SessionJoinService._get_session_settings(session)
         SessionJoinService._check_entry_mode(merged, "email_code")
 
-        verification = GuestEmailVerificationRepository.get_by_email(db, email)
+        # Verification and existing participant are independent lookups; one round trip
+        verification = SessionParticipantRepository.get_guest_join_info(db, session.id, email)
         if not verification:
             raise ValueError("Guest email not verified. Complete email-code flow first.")
 
-        existing = SessionParticipantRepository.get_by_session_and_guest_email(db, session.id, email)
-        if existing:
-            logger.info("session_join_guest_existing", session_id=session.id, participant_id=existing.id)
+        if verification.participant_id is not None:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("session_join_guest_existing", session_id=session.id, participant_id=verification.participant_id)
             return {
-                "participant_id": existing.id,
+                "participant_id": verification.participant_id,
                 "session_id": session.id,
-                "display_name": existing.display_name or email,
+                "display_name": verification.participant_display_name or email,
             }
 
-        SessionJoinService._check_max_participants(db, session.id, merged)
-        SessionJoinService._enforce_fingerprint_limit(
-            db=db,
-            session_id=session.id,
-            fingerprint=fingerprint,
-            entry_type="email_code",
-        )
-        participant = SessionParticipantRepository.create(
+        SessionJoinService._check_max_participants(participant_count, merged)
+        fingerprint_hash = SessionJoinService._hash_fingerprint(fingerprint)
+        now = datetime.now(timezone.utc)
+        participant = SessionParticipantRepository.create_if_absent(
             db,
             session_id=session.id,
-            participant_type=ParticipantType.GUEST_EMAIL.value,
+            participant_type=_GUEST_TYPE,
+            display_name=verification.verification_display_name or email,
             guest_email=email,
-            display_name=verification.display_name or email,
         )
-        db.flush()
-        SessionJoinService._track_fingerprint_join(
+        if participant is None:
+            # A concurrent join created it first
+            db.rollback()
+            existing = SessionParticipantRepository.get_by_session_and_guest_email(db, session.id, email)
+            if not existing:
+                raise ValueError("Could not join session. Please try again.")
+            return {
+                "participant_id": existing.id,
+                "session_id": session.id,
+                "display_name": existing.display_name or email,
+            }
+        SessionJoinService._record_fingerprint_join(
             db=db,
             session_id=session.id,
-            fingerprint=fingerprint,
+            fingerprint_hash=fingerprint_hash,
             entry_type="email_code",
             participant_id=participant.id,
+            now=now,
         )
         db.commit()
-        db.refresh(participant)
-        logger.info("session_join_guest", session_id=session.id, participant_id=participant.id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_join_guest", session_id=session.id, participant_id=participant.id)
         return {
             "participant_id": participant.id,
             "session_id": session.id,
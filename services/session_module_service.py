@@ -4,9 +4,8 @@ from sqlalchemy.orm import Session
 from repositories.session_module_repository import SessionModuleRepository
 from repositories.workspace_module_repository import WorkspaceModuleRepository
 from repositories.session_repository import SessionRepository
-from repositories.workspace_repository import WorkspaceRepository
 from models.session_module import SessionModule
-from models.workspace_module import ModuleType
+from models.workspace_module import MODULE_TYPE_VALUES
 from utils.module_settings import validate_module_settings
 import structlog
 
@@ -41,11 +40,11 @@ class SessionModuleService:
             ValueError: If session/workspace module not found, access denied, or validation fails
         """
         # Check session ownership
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository.get_with_workspace(db, session_id)
         if not session:
             raise ValueError("Session not found")
         
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
+        workspace = session.workspace
         if not workspace or workspace.user_id != user_id:
             raise ValueError("Session not found or access denied")
         
@@ -62,9 +61,10 @@ class SessionModuleService:
         # - next duplicates use " (1)", " (2)", ...
         if name is None:
             base_name = workspace_module.name
-            # Find existing modules with same base name
-            existing_modules = SessionModuleRepository.get_by_session_id(db, session_id)
-            existing_names = {m.name for m in existing_modules}
+            # Only names that can collide with the base name or its suffixes
+            existing_names = set(
+                SessionModuleRepository.get_names_matching_base(db, session_id, base_name)
+            )
 
             if base_name not in existing_names:
                 name = base_name
@@ -88,7 +88,6 @@ class SessionModuleService:
         
         # Commit transaction
         db.commit()
-        db.refresh(module)
         
         logger.info("session_module_added_from_workspace", 
                    module_id=module.id, session_id=session_id, workspace_module_id=workspace_module_id)
@@ -125,11 +124,11 @@ class SessionModuleService:
             ValueError: If session/module not found, access denied, or validation fails
         """
         # Check session ownership
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository.get_with_workspace(db, session_id)
         if not session:
             raise ValueError("Session not found")
         
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
+        workspace = session.workspace
         if not workspace or workspace.user_id != user_id:
             raise ValueError("Session not found or access denied")
         
@@ -142,7 +141,7 @@ class SessionModuleService:
             raise ValueError("Module not found or access denied")
         
         # Validate module type if provided
-        if module_type is not None and module_type not in [mt.value for mt in ModuleType]:
+        if module_type is not None and module_type not in MODULE_TYPE_VALUES:
             raise ValueError(f"Invalid module type: {module_type}")
         
         # Validate settings if provided
@@ -160,7 +159,6 @@ class SessionModuleService:
         
         if updated_module:
             db.commit()
-            db.refresh(updated_module)
             logger.info("session_module_updated", module_id=module_id, session_id=session_id)
         
         return updated_module
@@ -188,11 +186,11 @@ class SessionModuleService:
             ValueError: If session/module not found or access denied
         """
         # Check session ownership
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository.get_with_workspace(db, session_id)
         if not session:
             raise ValueError("Session not found")
         
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
+        workspace = session.workspace
         if not workspace or workspace.user_id != user_id:
             raise ValueError("Session not found or access denied")
         
@@ -213,7 +211,6 @@ class SessionModuleService:
         
         if active_module:
             db.commit()
-            db.refresh(active_module)
             logger.info("session_module_activated", module_id=module_id, session_id=session_id)
         
         return active_module
@@ -230,15 +227,17 @@ class SessionModuleService:
         Returns:
             True if session was updated (had an active module), False otherwise.
         """
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository.get_with_workspace(db, session_id)
         if not session:
             raise ValueError("Session not found")
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
+        workspace = session.workspace
         if not workspace or workspace.user_id != user_id:
             raise ValueError("Session not found or access denied")
         if not session.active_module_id:
             return False
-        SessionModuleRepository.deactivate_all_modules(db=db, session_id=session_id)
+        SessionModuleRepository.deactivate_module(
+            db=db, session_id=session_id, module_id=session.active_module_id
+        )
         db.commit()
         logger.info("session_module_deactivated", session_id=session_id)
         return True
@@ -268,11 +267,11 @@ class SessionModuleService:
             ValueError: If session/module not found or access denied
         """
         # Check session ownership
-        session = SessionRepository.get_by_id(db, session_id)
+        session = SessionRepository.get_with_workspace(db, session_id)
         if not session:
             raise ValueError("Session not found")
         
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
+        workspace = session.workspace
         if not workspace or workspace.user_id != user_id:
             raise ValueError("Session not found or access denied")
         
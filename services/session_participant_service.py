@@ -1,10 +1,12 @@
 """Service for session participants: heartbeat, list, resolve participant."""
+import threading
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session as DBSession
 
-from core.auth import verify_token
+from core.auth import verify_token_cached
+from core.config import settings
 from models.session_participant import SessionParticipant, ParticipantType
 from repositories.session_repository import SessionRepository
 from repositories.session_participant_repository import (
@@ -22,12 +24,24 @@ def _normalize_email(email: str) -> str:
     return email.strip().lower()
 
 
+# Latest heartbeat per participant, written by flush_heartbeats. Activity is
+# read at HEARTBEAT_ACTIVE_SECONDS resolution, so a short flush delay is harmless.
+_heartbeat_buffer: Dict[int, datetime] = {}
+_heartbeat_lock = threading.Lock()
+_HEARTBEAT_BUFFERED = settings.HEARTBEAT_FLUSH_INTERVAL_SECONDS > 0
+
+_HEARTBEAT_ACTIVE_WINDOW = timedelta(seconds=HEARTBEAT_ACTIVE_SECONDS)
+_GUEST_TYPE = ParticipantType.GUEST_EMAIL.value
+# Participant types allowed to rename themselves
+_SELF_RENAMABLE_TYPES = frozenset((ParticipantType.ANONYMOUS.value, _GUEST_TYPE))
+
+
 class SessionParticipantService:
     """Business logic for participants: resolve, heartbeat, list."""
 
     @staticmethod
     def _serialize_participant(p: SessionParticipant) -> Dict[str, Any]:
-        threshold = datetime.now(timezone.utc) - timedelta(seconds=HEARTBEAT_ACTIVE_SECONDS)
+        threshold = datetime.now(timezone.utc) - _HEARTBEAT_ACTIVE_WINDOW
         is_active = p.last_heartbeat_at is not None and p.last_heartbeat_at >= threshold
         return {
             "id": p.id,
@@ -51,15 +65,28 @@ class SessionParticipantService:
         Tries: auth_token (Authorization) first, then participant_token_from_body.
         Raises ValueError if not found or invalid.
         """
+        token = auth_token or participant_token_from_body
+        payload = verify_token_cached(token) if token else None
+
+        # Fast path for participant tokens (heartbeat/polling): participant and
+        # session in one query. Anything else goes through the checks below.
+        if payload and payload.get("type") == "session_participant":
+            try:
+                participant_id = int(payload.get("sub"))
+            except (ValueError, TypeError):
+                participant_id = None
+            if participant_id is not None:
+                found = SessionParticipantRepository.get_for_passcode(db, participant_id, passcode)
+                if found and found[1].id == payload.get("session_id"):
+                    return found[0], found[1]
+
         session = SessionRepository.get_by_passcode(db, passcode)
         if not session:
             raise ValueError("Session not found")
 
-        token = auth_token or participant_token_from_body
         if not token:
             raise ValueError("Missing participant token or Authorization")
 
-        payload = verify_token(token)
         if not payload:
             raise ValueError("Invalid or expired token")
 
@@ -74,8 +101,8 @@ class SessionParticipantService:
                 participant_id = int(participant_id_str)
             except (ValueError, TypeError):
                 raise ValueError("Invalid participant token")
-            participant = SessionParticipantRepository.get_by_id(db, participant_id)
-            if not participant or participant.session_id != session.id:
+            participant = SessionParticipantRepository.get_for_session(db, participant_id, session.id)
+            if not participant:
                 raise ValueError("Participant not found")
             return participant, session
 
@@ -111,15 +138,37 @@ class SessionParticipantService:
 
     @staticmethod
     def heartbeat(db: DBSession, participant_id: int) -> None:
-        """Update last_heartbeat_at for participant. Commits."""
+        """Record heartbeat for participant (buffered; commits only when buffering is disabled)."""
+        if _HEARTBEAT_BUFFERED:
+            with _heartbeat_lock:
+                _heartbeat_buffer[participant_id] = datetime.now(timezone.utc)
+            return
         SessionParticipantRepository.update_heartbeat(db, participant_id)
         db.commit()
 
+    @staticmethod
+    def flush_heartbeats(db: DBSession) -> int:
+        """Write buffered heartbeats in one statement. Commits. Returns rows updated."""
+        global _heartbeat_buffer
+        with _heartbeat_lock:
+            pending, _heartbeat_buffer = _heartbeat_buffer, {}
+        if not pending:
+            return 0
+        updated = SessionParticipantRepository.bulk_update_heartbeats(db, pending)
+        db.commit()
+        return updated
+
     @staticmethod
     def list_participants(db: DBSession, session_id: int) -> List[Dict[str, Any]]:
         """List participants with display_name, participant_type, is_active, guest_email."""
-        participants = SessionParticipantRepository.get_by_session_id(db, session_id)
-        return [SessionParticipantService._serialize_participant(p) for p in participants]
+        rows = SessionParticipantRepository.list_with_activity(db, session_id)
+        return [
+            {
+                **row._mapping,
+                "created_at": row.created_at.isoformat() if row.created_at else None,
+            }
+            for row in rows
+        ]
 
     @staticmethod
     def get_active_count(db: DBSession, session_id: int) -> int:
@@ -172,10 +221,7 @@ class SessionParticipantService:
         participant, _ = SessionParticipantService.resolve_participant(
             db, passcode, auth_token, participant_token_from_body
         )
-        if participant.participant_type not in (
-            ParticipantType.ANONYMOUS.value,
-            ParticipantType.GUEST_EMAIL.value,
-        ):
+        if participant.participant_type not in _SELF_RENAMABLE_TYPES:
             raise ValueError("Display name can be changed only for anonymous or email-code participants")
 
         value = (display_name or "").strip()
@@ -185,9 +231,10 @@ class SessionParticipantService:
         SessionParticipantRepository.update_display_name(db, participant.id, value)
 
         # Keep guest verification display name in sync for future joins.
-        if participant.participant_type == ParticipantType.GUEST_EMAIL.value and participant.guest_email:
+        if participant.participant_type == _GUEST_TYPE and participant.guest_email:
             GuestEmailVerificationRepository.upsert(db, participant.guest_email, value)
 
+        # participant is the identity-mapped instance updated above; it stays
+        # loaded after commit, so no reload is needed
         db.commit()
-        db.refresh(participant)
         return SessionParticipantService._serialize_participant(participant)
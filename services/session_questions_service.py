@@ -1,20 +1,51 @@
 """Service for Questions module: messages, likes, lecturer actions."""
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+import itertools
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
+from cachetools import TTLCache
 from sqlalchemy.orm import Session as DBSession
 
+from core.config import settings
 from models.workspace_module import ModuleType
 from repositories.session_module_repository import SessionModuleRepository
 from repositories.session_repository import SessionRepository
-from repositories.workspace_repository import WorkspaceRepository
 from repositories.session_question_message_repository import SessionQuestionMessageRepository
-from repositories.session_participant_repository import SessionParticipantRepository
 from utils.module_settings import get_questions_settings, get_questions_max_length
+import logging
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+_QUESTIONS_MODULE = ModuleType.QUESTIONS.value
+
+# Participant message pages without per-viewer fields, keyed by
+# (module_id, module version, limit, offset, replies_preview, allow_anonymous). Bumping the
+# module version on a write orphans its pages until they expire.
+_page_cache: TTLCache = TTLCache(
+    maxsize=settings.QUESTIONS_LIST_CACHE_MAX_SIZE,
+    ttl=max(settings.QUESTIONS_LIST_CACHE_TTL_SECONDS, 1),
+)
+# Module versions live only as long as the pages they orphan. Versions come from
+# one process-wide counter, so a version that expired or was evicted is never
+# reissued; a lost version at worst lets older pages run out their own TTL.
+_page_versions: TTLCache = TTLCache(
+    maxsize=settings.QUESTIONS_LIST_CACHE_MAX_SIZE,
+    ttl=max(settings.QUESTIONS_LIST_CACHE_TTL_SECONDS, 1),
+)
+_page_version_counter = itertools.count(1)
+_page_cache_lock = threading.Lock()
+_PAGE_CACHE_ENABLED = settings.QUESTIONS_LIST_CACHE_TTL_SECONDS > 0
+
+
+def _invalidate_pages(module_id: int) -> None:
+    """Drop cached participant pages of a module after a write in this process."""
+    if not _PAGE_CACHE_ENABLED:
+        return
+    with _page_cache_lock:
+        _page_versions[module_id] = next(_page_version_counter)
+
 
 def _serialize_message(
     msg,
@@ -22,24 +53,35 @@ def _serialize_message(
     *,
     allow_anonymous: bool = False,
     liked_by_me: bool = False,
+    reply_count: Optional[int] = None,
 ) -> Dict[str, Any]:
-    """Serialize message for API response. When allow_anonymous and msg.is_anonymous, hide author to participants."""
-    author = msg.participant.display_name if msg.participant else None
-    if allow_anonymous and getattr(msg, "is_anonymous", False):
+    """Serialize message for API response. When allow_anonymous and msg.is_anonymous, hide author to participants.
+    reply_count defaults to the number of children given (pass the total when children is a preview).
+    """
+    is_anonymous = bool(msg.is_anonymous)
+    if allow_anonymous and is_anonymous:
         author = "Anonymous"
+    else:
+        participant = msg.participant
+        author = participant.display_name if participant else None
+    if reply_count is None:
+        reply_count = len(children) if children else 0
+    created_at = msg.created_at
+    pinned_at = msg.pinned_at
     return {
         "id": msg.id,
         "session_module_id": msg.session_module_id,
         "participant_id": msg.participant_id,
         "author_display_name": author,
-        "is_anonymous": bool(getattr(msg, "is_anonymous", False)),
+        "is_anonymous": is_anonymous,
         "parent_id": msg.parent_id,
         "content": msg.content,
         "likes_count": msg.likes_count,
         "liked_by_me": liked_by_me,
         "is_answered": msg.is_answered,
-        "created_at": msg.created_at.isoformat() if msg.created_at else None,
-        "pinned_at": msg.pinned_at.isoformat() if getattr(msg, "pinned_at", None) else None,
+        "created_at": created_at.isoformat() if created_at else None,
+        "pinned_at": pinned_at.isoformat() if pinned_at else None,
+        "reply_count": reply_count,
         "children": children or [],
     }
 
@@ -48,17 +90,70 @@ class SessionQuestionsService:
     """Business logic for Questions module."""
 
     @staticmethod
-    def _validate_questions_module(db: DBSession, session_module_id: int, session_id: int):
-        """Ensure module exists, is Questions type, and belongs to session. Returns module."""
-        module = SessionModuleRepository.get_by_id(db, session_module_id)
+    def _check_questions_module(module, session_id: int):
+        """Ensure already loaded module exists, is Questions type, and belongs to session. Returns module."""
         if not module or module.is_deleted:
             raise ValueError("Module not found")
         if module.session_id != session_id:
             raise ValueError("Module not in this session")
-        if module.module_type != ModuleType.QUESTIONS.value:
+        if module.module_type != _QUESTIONS_MODULE:
             raise ValueError("Module is not a Questions module")
         return module
 
+    @staticmethod
+    def _get_page(
+        db: DBSession,
+        module_id: int,
+        limit: int,
+        offset: int,
+        replies_preview: Optional[int],
+        allow_anonymous: bool,
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """
+        Serialized page with liked_by_me unset, plus ids of all messages on it.
+        With replies_preview, children holds only the first N replies (reply_count has the total).
+        Served from the per-process page cache when enabled; cached dicts must not be mutated.
+        """
+        if _PAGE_CACHE_ENABLED:
+            with _page_cache_lock:
+                key = (
+                    module_id, _page_versions.get(module_id, 0),
+                    limit, offset, replies_preview, allow_anonymous,
+                )
+                page = _page_cache.get(key)
+            if page is not None:
+                return page
+
+        messages = SessionQuestionMessageRepository.list_by_module(
+            db, module_id, limit=limit, offset=offset, load_children=replies_preview is None
+        )
+        if replies_preview is None:
+            threads = {m.id: (len(m.children), m.children) for m in messages}
+        else:
+            threads = SessionQuestionMessageRepository.list_reply_previews(
+                db, [m.id for m in messages], replies_preview
+            )
+        serialized = []
+        message_ids = []
+        for msg in messages:
+            reply_count, replies = threads.get(msg.id, (0, []))
+            serialized.append(_serialize_message(
+                msg,
+                children=[
+                    _serialize_message(c, allow_anonymous=allow_anonymous)
+                    for c in replies
+                ],
+                allow_anonymous=allow_anonymous,
+                reply_count=reply_count,
+            ))
+            message_ids.append(msg.id)
+            message_ids.extend(c.id for c in replies)
+        page = (serialized, message_ids)
+        if _PAGE_CACHE_ENABLED:
+            with _page_cache_lock:
+                _page_cache[key] = page
+        return page
+
     @staticmethod
     def list_messages(
         db: DBSession,
@@ -67,36 +162,39 @@ class SessionQuestionsService:
         participant_id: int,
         limit: int = 100,
         offset: int = 0,
+        replies_preview: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """List messages for Questions module. Caller must be participant (validated in endpoint)."""
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
+        """List messages for Questions module. Caller must be participant (validated in endpoint).
+        replies_preview limits children to the first N replies per message (None = all).
+        """
+        context = SessionRepository.get_with_module_by_passcode(db, passcode, module_id)
+        if not context:
             raise ValueError("Session not found")
-        module = SessionQuestionsService._validate_questions_module(db, module_id, session.id)
+        session, module = context
+        SessionQuestionsService._check_questions_module(module, session.id)
         opts = get_questions_settings(module.settings)
 
-        messages = SessionQuestionMessageRepository.list_by_module(db, module_id, limit=limit, offset=offset)
         allow_anonymous = opts.get("allow_anonymous", False)
-        result = []
-        for msg in messages:
-            child_msgs = SessionQuestionMessageRepository.get_children(db, msg.id)
-            result.append(_serialize_message(
-                msg,
-                children=[
-                    _serialize_message(
-                        c,
-                        allow_anonymous=allow_anonymous,
-                        liked_by_me=SessionQuestionMessageRepository.is_liked_by(
-                            db, c.id, participant_id
-                        ),
-                    )
-                    for c in child_msgs
-                ],
-                allow_anonymous=allow_anonymous,
-                liked_by_me=SessionQuestionMessageRepository.is_liked_by(
-                    db, msg.id, participant_id
-                ),
-            ))
+        messages, message_ids = SessionQuestionsService._get_page(
+            db, module_id, limit, offset, replies_preview, allow_anonymous
+        )
+        # Likes for the whole page (messages and their replies) in one query
+        liked_ids = SessionQuestionMessageRepository.get_liked_message_ids(
+            db, message_ids, participant_id
+        )
+        if liked_ids:
+            result = [
+                {
+                    **m,
+                    "liked_by_me": m["id"] in liked_ids,
+                    "children": [
+                        {**c, "liked_by_me": c["id"] in liked_ids} for c in m["children"]
+                    ],
+                }
+                for m in messages
+            ]
+        else:
+            result = list(messages)
         return {
             "messages": result,
             "settings": {
@@ -108,6 +206,40 @@ class SessionQuestionsService:
             },
         }
 
+    @staticmethod
+    def list_replies(
+        db: DBSession,
+        passcode: str,
+        module_id: int,
+        message_id: int,
+        participant_id: int,
+    ) -> Dict[str, Any]:
+        """All replies to a top-level message, oldest first. Caller must be participant."""
+        context = SessionRepository.get_with_module_by_passcode(db, passcode, module_id)
+        if not context:
+            raise ValueError("Session not found")
+        session, module = context
+        SessionQuestionsService._check_questions_module(module, session.id)
+        opts = get_questions_settings(module.settings)
+
+        parent = SessionQuestionMessageRepository.get_by_id(db, message_id)
+        if not parent or parent.session_module_id != module_id:
+            raise ValueError("Message not found")
+
+        replies = SessionQuestionMessageRepository.get_children(db, message_id)
+        liked_ids = SessionQuestionMessageRepository.get_liked_message_ids(
+            db, [r.id for r in replies], participant_id
+        )
+        allow_anonymous = opts.get("allow_anonymous", False)
+        return {
+            "messages": [
+                _serialize_message(
+                    r, allow_anonymous=allow_anonymous, liked_by_me=r.id in liked_ids
+                )
+                for r in replies
+            ],
+        }
+
     @staticmethod
     def list_messages_lecturer(
         db: DBSession,
@@ -118,13 +250,13 @@ class SessionQuestionsService:
         offset: int = 0,
     ) -> Dict[str, Any]:
         """List messages for Questions module. Lecturer only; always shows real author."""
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
+        context = SessionRepository.get_with_workspace_and_module(db, session_id, module_id)
+        if not context:
             raise ValueError("Session not found")
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
+        session, workspace, module = context
         if not workspace or workspace.user_id != user_id:
             raise ValueError("Not authorized")
-        module = SessionQuestionsService._validate_questions_module(db, module_id, session_id)
+        SessionQuestionsService._check_questions_module(module, session_id)
         opts = get_questions_settings(module.settings)
 
         messages = SessionQuestionMessageRepository.list_by_module(
@@ -132,12 +264,12 @@ class SessionQuestionsService:
         )
         result = []
         for msg in messages:
-            child_msgs = SessionQuestionMessageRepository.get_children(db, msg.id)
             result.append(
                 _serialize_message(
                     msg,
                     children=[
-                        _serialize_message(c, allow_anonymous=False) for c in child_msgs
+                        _serialize_message(c, allow_anonymous=False)
+                        for c in msg.children
                     ],
                     allow_anonymous=False,
                 )
@@ -164,16 +296,15 @@ class SessionQuestionsService:
         is_anonymous: bool = False,
     ) -> Dict[str, Any]:
         """Create message. Commits."""
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
+        context = SessionRepository.get_with_module_by_passcode(db, passcode, module_id)
+        if not context:
             raise ValueError("Session not found")
-        module = SessionQuestionsService._validate_questions_module(db, module_id, session.id)
+        session, module = context
+        SessionQuestionsService._check_questions_module(module, session.id)
         opts = get_questions_settings(module.settings)
 
-        participant = SessionParticipantRepository.get_by_id(db, participant_id)
-        if not participant or participant.is_banned:
-            raise ValueError("You are banned from this session")
-
+        # Request-only checks first, then reads, then the module lock, so
+        # rejected posts cost no queries and the lock is held only briefly
         content = (content or "").strip()
         if not content:
             raise ValueError("Content is required")
@@ -185,31 +316,44 @@ class SessionQuestionsService:
         if parent_id is not None and not opts["allow_participant_answers"]:
             raise ValueError("Participant answers are disabled for this module")
 
+        if is_anonymous and not opts.get("allow_anonymous", False):
+            raise ValueError("Anonymous questions are disabled for this module")
+
+        # Ban and cooldown checks share one round trip
+        now = datetime.now(timezone.utc)
+        cooldown_seconds = opts["cooldown_seconds"] if opts["cooldown_enabled"] else 0
+        author = SessionQuestionMessageRepository.get_author_with_last_created_at(
+            db,
+            participant_id,
+            module_id,
+            now - timedelta(seconds=cooldown_seconds) if cooldown_seconds > 0 else None,
+        )
+        if not author:
+            raise ValueError("You are banned from this session")
+        participant, last_created_at = author
+        if participant.is_banned:
+            raise ValueError("You are banned from this session")
+        if last_created_at:
+            elapsed = (now - last_created_at).total_seconds()
+            wait = int(cooldown_seconds - elapsed)
+            raise ValueError(f"Please wait {wait} seconds before posting again")
+
         if parent_id is None and opts["max_questions_total"] is not None:
+            # Serialize creators in this module until commit so concurrent posts
+            # cannot both pass the limit
+            SessionModuleRepository.lock(db, module_id)
             count = SessionQuestionMessageRepository.count_top_level_by_module(db, module_id)
             if count >= opts["max_questions_total"]:
                 raise ValueError("Maximum number of questions reached")
 
-        if is_anonymous and not opts.get("allow_anonymous", False):
-            raise ValueError("Anonymous questions are disabled for this module")
-
-        if opts["cooldown_enabled"] and opts["cooldown_seconds"] > 0:
-            last = SessionQuestionMessageRepository.get_last_by_participant_in_module(
-                db, module_id, participant_id
-            )
-            if last and last.created_at:
-                elapsed = (datetime.now(timezone.utc) - last.created_at).total_seconds()
-                if elapsed < opts["cooldown_seconds"]:
-                    wait = int(opts["cooldown_seconds"] - elapsed)
-                    raise ValueError(f"Please wait {wait} seconds before posting again")
-
         msg = SessionQuestionMessageRepository.create(
             db, module_id, participant_id, content, parent_id,
             is_anonymous=is_anonymous,
         )
         db.commit()
-        db.refresh(msg)
-        logger.info("session_question_message_created", message_id=msg.id, module_id=module_id)
+        _invalidate_pages(module_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_question_message_created", message_id=msg.id, module_id=module_id)
         return _serialize_message(msg)
 
     @staticmethod
@@ -221,31 +365,33 @@ class SessionQuestionsService:
         participant_id: int,
     ) -> Dict[str, Any]:
         """Toggle like on message. Commits."""
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
+        context = SessionRepository.get_with_module_by_passcode(db, passcode, module_id)
+        if not context:
             raise ValueError("Session not found")
-        module = SessionQuestionsService._validate_questions_module(db, module_id, session.id)
+        session, module = context
+        SessionQuestionsService._check_questions_module(module, session.id)
         opts = get_questions_settings(module.settings)
         if not opts["likes_enabled"]:
             raise ValueError("Likes are disabled for this module")
 
-        msg = SessionQuestionMessageRepository.get_by_id(db, message_id)
-        if not msg or msg.session_module_id != module_id:
-            raise ValueError("Message not found")
-
-        removed = SessionQuestionMessageRepository.remove_like(
-            db, message_id, participant_id
+        # Counter is adjusted in the same statement as the like row, so
+        # concurrent toggles never lose updates
+        result = SessionQuestionMessageRepository.remove_like(
+            db, message_id, module_id, participant_id
         )
+        if result is None:
+            raise ValueError("Message not found")
         liked_by_me = False
-        if removed:
-            msg.likes_count = max(0, msg.likes_count - 1)
-        else:
-            SessionQuestionMessageRepository.add_like(db, message_id, participant_id)
-            msg.likes_count += 1
+        if not result.changed:
+            result = SessionQuestionMessageRepository.add_like(
+                db, message_id, module_id, participant_id
+            )
+            if result is None:
+                raise ValueError("Message not found")
             liked_by_me = True
         db.commit()
-        db.refresh(msg)
-        return {"likes_count": msg.likes_count, "liked_by_me": liked_by_me}
+        _invalidate_pages(module_id)
+        return {"likes_count": result.likes_count, "liked_by_me": liked_by_me}
 
     @staticmethod
     def lecturer_patch_message(
@@ -260,33 +406,39 @@ class SessionQuestionsService:
         unpin: bool = False,
     ) -> Dict[str, Any]:
         """Lecturer: set is_answered, soft delete, or pin/unpin. Commits."""
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
-            raise ValueError("Session not found")
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Not authorized")
-
-        SessionQuestionsService._validate_questions_module(db, module_id, session_id)
+        now = datetime.now(timezone.utc)
+        changes: Dict[str, Any] = {"updated_at": now}
+        if delete:
+            changes.update(is_deleted=True, deleted_at=now)
+        else:
+            if pin:
+                changes["pinned_at"] = now
+            if unpin:
+                changes["pinned_at"] = None
+            if is_answered is not None:
+                changes["is_answered"] = is_answered
 
-        msg = SessionQuestionMessageRepository.get_by_id(db, message_id)
-        if not msg or msg.session_module_id != module_id:
+        # Ownership, module and message checks live in the UPDATE itself; the
+        # context is only loaded to explain a miss
+        msg = SessionQuestionMessageRepository.lecturer_update(
+            db, user_id, session_id, module_id, message_id, changes
+        )
+        if msg is None:
+            context = SessionRepository.get_with_workspace_and_module(db, session_id, module_id)
+            if not context:
+                raise ValueError("Session not found")
+            session, workspace, module = context
+            if not workspace or workspace.user_id != user_id:
+                raise ValueError("Not authorized")
+            SessionQuestionsService._check_questions_module(module, session_id)
             raise ValueError("Message not found")
 
         if delete:
-            SessionQuestionMessageRepository.soft_delete(db, message_id)
             db.commit()
+            _invalidate_pages(module_id)
             return {"deleted": True}
 
-        if pin:
-            SessionQuestionMessageRepository.update_pinned_at(
-                db, message_id, datetime.now(timezone.utc)
-            )
-        if unpin:
-            SessionQuestionMessageRepository.update_pinned_at(db, message_id, None)
-
-        if is_answered is not None:
-            SessionQuestionMessageRepository.update_is_answered(db, message_id, is_answered)
+        result = _serialize_message(msg)
         db.commit()
-        db.refresh(msg)
-        return _serialize_message(msg)
+        _invalidate_pages(module_id)
+        return result
@@ -1,20 +1,46 @@
 """Session service."""
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from repositories.session_repository import SessionRepository
-from repositories.workspace_repository import WorkspaceRepository
 from models.session import Session as SessionModel, SessionStatus
-from models.workspace import WorkspaceStatus
-from datetime import datetime, timezone
+from models.workspace import Workspace, WorkspaceStatus
+import logging
 import structlog
 import json
 
 logger = structlog.get_logger(__name__)
 
+_SESSION_ARCHIVE = SessionStatus.ARCHIVE.value
+_SESSION_ACTIVE = SessionStatus.ACTIVE.value
+_WS_ARCHIVE = WorkspaceStatus.ARCHIVE.value
+
 
 class SessionService:
     """Service for session operations."""
     
+    @staticmethod
+    def _load_session_with_workspace(
+        db: Session,
+        session_id: int,
+        user_id: int
+    ) -> Optional[Tuple[SessionModel, Workspace]]:
+        """
+        Load session (deleted included) and its workspace in one query.
+        
+        Returns (session, workspace) or None if the session does not exist.
+        
+        Raises:
+            ValueError: If the workspace does not belong to user_id
+        """
+        session = SessionRepository.get_with_workspace(db, session_id)
+        if not session:
+            return None
+        workspace = session.workspace
+        if not workspace or workspace.user_id != user_id:
+            raise ValueError("Session not found or access denied")
+        return session, workspace
+    
     @staticmethod
     def start_session(
         db: Session,
@@ -32,21 +58,17 @@ class SessionService:
         Returns:
             Started session or None if not found
         """
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
+        loaded = SessionService._load_session_with_workspace(db, session_id, user_id)
+        if not loaded:
             return None
-        
-        # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Session not found or access denied")
+        session, workspace = loaded
         
         # Check if workspace is deleted
         if workspace.is_deleted:
             raise ValueError("Cannot start session in deleted workspace")
         
         # Check if workspace is archived
-        if workspace.status == WorkspaceStatus.ARCHIVE.value:
+        if workspace.status == _WS_ARCHIVE:
             raise ValueError("Cannot start session in archived workspace")
         
         # Check if session is deleted
@@ -54,38 +76,22 @@ class SessionService:
             raise ValueError("Cannot start deleted session")
         
         # Check if session is archived
-        if session.status == SessionStatus.ARCHIVE.value:
+        if session.status == _SESSION_ARCHIVE:
             raise ValueError("Cannot start archived session")
         
         # Check if session is already started (not stopped)
         if not session.is_stopped and session.start_datetime:
             raise ValueError("Cannot start session that is already running")
         
-        # Set start_datetime only if NULL (first start)
-        start_datetime = None
-        if not session.start_datetime:
-            start_datetime = datetime.now(timezone.utc)
-        
-        # Update session: set start_datetime if needed, clear end_datetime
-        SessionRepository.update_status(
-            db=db,
-            session_id=session_id,
-            status=SessionStatus.ACTIVE.value,
-            start_datetime=start_datetime,
-            clear_end_datetime=True
-        )
-        
-        # Clear stopped_participant_count and set is_stopped = False
-        SessionRepository.clear_session_run_data(db=db, session_id=session_id)
-        
-        # Ensure is_stopped is False
-        session.is_stopped = False
+        # Single UPDATE: start_datetime set only on first start (database now()),
+        # run data cleared, is_stopped = False; RETURNING refreshes the loaded session
+        session = SessionRepository.start(db=db, session_id=session_id)
         
         # Commit transaction
         db.commit()
-        db.refresh(session)
         
-        logger.info("session_started", session_id=session_id, workspace_id=session.workspace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_started", session_id=session_id, workspace_id=session.workspace_id)
         
         return session
     
@@ -108,21 +114,17 @@ class SessionService:
         Returns:
             Stopped session or None if not found
         """
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
+        loaded = SessionService._load_session_with_workspace(db, session_id, user_id)
+        if not loaded:
             return None
-        
-        # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Session not found or access denied")
+        session, workspace = loaded
         
         # Check if workspace is deleted
         if workspace.is_deleted:
             raise ValueError("Cannot stop session in deleted workspace")
         
         # Check if workspace is archived
-        if workspace.status == WorkspaceStatus.ARCHIVE.value:
+        if workspace.status == _WS_ARCHIVE:
             raise ValueError("Cannot stop session in archived workspace")
         
         # Check if session is deleted
@@ -130,7 +132,7 @@ class SessionService:
             raise ValueError("Cannot stop deleted session")
         
         # Check if session is archived
-        if session.status == SessionStatus.ARCHIVE.value:
+        if session.status == _SESSION_ARCHIVE:
             raise ValueError("Cannot stop archived session")
         
         # Check if session is already stopped
@@ -145,35 +147,24 @@ class SessionService:
         if participant_count < 0:
             raise ValueError("Participant count cannot be negative")
         
-        # Set end_datetime and stopped_participant_count, keep status as ACTIVE
-        end_datetime = datetime.now(timezone.utc)
-        
-        # Validate end_datetime is not earlier than start_datetime
-        if session.start_datetime and end_datetime < session.start_datetime:
+        # Single UPDATE (status stays ACTIVE) with end_datetime = database now();
+        # RETURNING refreshes the loaded session. ck_sessions_end_after_start
+        # guards against an end before start_datetime.
+        try:
+            session = SessionRepository.stop(
+                db=db,
+                session_id=session_id,
+                stopped_participant_count=participant_count
+            )
+        except IntegrityError:
+            db.rollback()
             raise ValueError("end_datetime cannot be earlier than start_datetime")
         
-        SessionRepository.update_status(
-            db=db,
-            session_id=session_id,
-            status=SessionStatus.ACTIVE.value,  # Keep status as ACTIVE
-            end_datetime=end_datetime
-        )
-        
-        # Set stopped_participant_count
-        SessionRepository.update_stopped_participant_count(
-            db=db,
-            session_id=session_id,
-            stopped_participant_count=participant_count
-        )
-        
-        # Set is_stopped = True
-        session.is_stopped = True
-        
         # Commit transaction
         db.commit()
-        db.refresh(session)
         
-        logger.info("session_stopped", session_id=session_id, workspace_id=session.workspace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_stopped", session_id=session_id, workspace_id=session.workspace_id)
         
         return session
     
@@ -194,33 +185,28 @@ class SessionService:
         Returns:
             Restored session or None if not found
         """
-        # Get session including deleted ones
-        session = db.query(SessionModel).filter(
-            SessionModel.id == session_id,
-            SessionModel.is_deleted == True
-        ).first()
-        
-        if not session:
-            # Check if session exists but is not deleted
-            existing = db.query(SessionModel).filter(SessionModel.id == session_id).first()
-            if existing and not existing.is_deleted:
-                raise ValueError("Cannot restore session that is not deleted")
+        # Probe deletion state and ownership without loading the full row
+        probe = SessionRepository.get_owner_probe(db, session_id)
+        if not probe:
             return None
+        if not probe.is_deleted:
+            raise ValueError("Cannot restore session that is not deleted")
         
         # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
+        if probe.owner_user_id != user_id:
             raise ValueError("Session not found or access denied")
         
-        # Restore session
-        session.is_deleted = False
-        session.deleted_at = None
+        # Restore session; RETURNING loads the full row for the response
+        session = SessionRepository.restore(db, session_id)
+        if not session:
+            # Restored concurrently since the probe
+            raise ValueError("Cannot restore session that is not deleted")
         
         # Commit transaction
         db.commit()
-        db.refresh(session)
         
-        logger.info("session_restored", session_id=session_id, workspace_id=session.workspace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_restored", session_id=session_id, workspace_id=session.workspace_id)
         
         return session
     
@@ -243,14 +229,10 @@ class SessionService:
         Returns:
             Deleted session or None if not found
         """
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
+        loaded = SessionService._load_session_with_workspace(db, session_id, user_id)
+        if not loaded:
             return None
-        
-        # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Session not found or access denied")
+        session, workspace = loaded
         
         # Check if session is running (not stopped)
         if not session.is_stopped:
@@ -263,12 +245,13 @@ class SessionService:
             # Commit transaction
             db.commit()
             
-            logger.info(
-                "session_deleted",
-                session_id=session_id,
-                workspace_id=session.workspace_id,
-                hard=hard
-            )
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "session_deleted",
+                    session_id=session_id,
+                    workspace_id=session.workspace_id,
+                    hard=hard
+                )
         
         return deleted_session
     
@@ -290,7 +273,7 @@ class SessionService:
             Archived session or None if not found
         """
         # Get session including deleted ones to check deletion status
-        session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+        session = SessionRepository.get_with_workspace(db, session_id)
         if not session:
             return None
         
@@ -299,7 +282,7 @@ class SessionService:
             raise ValueError("Cannot archive deleted session")
         
         # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
+        workspace = session.workspace
         if not workspace or workspace.user_id != user_id:
             raise ValueError("Session not found or access denied")
         
@@ -307,14 +290,14 @@ class SessionService:
         SessionRepository.update_status(
             db=db,
             session_id=session_id,
-            status=SessionStatus.ARCHIVE.value
+            status=_SESSION_ARCHIVE
         )
         
         # Commit transaction
         db.commit()
-        db.refresh(session)
         
-        logger.info("session_archived", session_id=session_id, workspace_id=session.workspace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_archived", session_id=session_id, workspace_id=session.workspace_id)
         
         return session
     
@@ -335,35 +318,31 @@ class SessionService:
         Returns:
             Unarchived session or None if not found
         """
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
+        loaded = SessionService._load_session_with_workspace(db, session_id, user_id)
+        if not loaded:
             return None
-        
-        # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Session not found or access denied")
+        session, workspace = loaded
         
         # Check if session is deleted
         if session.is_deleted:
             raise ValueError("Cannot unarchive deleted session")
         
         # Check if workspace is archived
-        if workspace.status == WorkspaceStatus.ARCHIVE.value:
+        if workspace.status == _WS_ARCHIVE:
             raise ValueError("Cannot unarchive session in archived workspace")
         
         # Update session status to ACTIVE
         SessionRepository.update_status(
             db=db,
             session_id=session_id,
-            status=SessionStatus.ACTIVE.value
+            status=_SESSION_ACTIVE
         )
         
         # Commit transaction
         db.commit()
-        db.refresh(session)
         
-        logger.info("session_unarchived", session_id=session_id, workspace_id=session.workspace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_unarchived", session_id=session_id, workspace_id=session.workspace_id)
         
         return session
     
@@ -386,14 +365,10 @@ class SessionService:
         Returns:
             Updated session or None if not found
         """
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
+        loaded = SessionService._load_session_with_workspace(db, session_id, user_id)
+        if not loaded:
             return None
-        
-        # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Session not found or access denied")
+        session, workspace = loaded
         
         # Check if workspace is deleted
         if workspace.is_deleted:
@@ -404,16 +379,16 @@ class SessionService:
             raise ValueError("Cannot update settings for deleted session")
         
         # Check if workspace is archived
-        if workspace.status == WorkspaceStatus.ARCHIVE.value:
+        if workspace.status == _WS_ARCHIVE:
             raise ValueError("Cannot update settings for session in archived workspace")
         
         SessionRepository.update_settings(db=db, session_id=session_id, new_settings=new_settings)
         
         # Commit transaction
         db.commit()
-        db.refresh(session)
         
-        logger.info("session_settings_updated", session_id=session_id, workspace_id=session.workspace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_settings_updated", session_id=session_id, workspace_id=session.workspace_id)
         
         return session
     
@@ -453,17 +428,45 @@ class SessionService:
         Raises:
             ValueError: If duplicate name found
         """
-        sessions = SessionRepository.get_by_workspace_id(
+        if SessionRepository.name_exists(
             db=db,
             workspace_id=workspace_id,
-            include_deleted=False
-        )
+            name=name,
+            exclude_session_id=exclude_session_id
+        ):
+            raise ValueError(f"Session with name '{name}' already exists in this workspace")
+    
+    @staticmethod
+    def check_names_batch(
+        db: Session,
+        workspace_id: int,
+        names: List[Tuple[str, Optional[int]]]
+    ) -> None:
+        """
+        Batch form of check_session_name_duplicate for bulk create/rename.
         
-        for session in sessions:
-            if exclude_session_id and session.id == exclude_session_id:
-                continue
-            if session.name.strip().lower() == name.strip().lower():
+        Loads the workspace's names once and checks every entry in memory, including
+        clashes between entries of the same batch.
+        
+        Args:
+            db: Database session
+            workspace_id: Workspace ID
+            names: (name, session_id being renamed or None for a new session) pairs
+        
+        Raises:
+            ValueError: On the first duplicate name found
+        """
+        renamed = {session_id for _, session_id in names if session_id is not None}
+        seen = {
+            row.normalized_name
+            for row in SessionRepository.get_normalized_names(db=db, workspace_id=workspace_id)
+            if row.id not in renamed
+        }
+        for name, _ in names:
+            normalized = name.strip().lower()
+            if normalized in seen:
                 raise ValueError(f"Session with name '{name}' already exists in this workspace")
+            seen.add(normalized)
     
     @staticmethod
     def regenerate_passcode(
@@ -487,14 +490,10 @@ class SessionService:
         """
         from utils.passcode import generate_unique_passcode
         
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
+        loaded = SessionService._load_session_with_workspace(db, session_id, user_id)
+        if not loaded:
             return None
-        
-        # Check workspace ownership
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Session not found or access denied")
+        session, workspace = loaded
         
         # Generate new unique passcode
         new_passcode = generate_unique_passcode(db)
@@ -504,9 +503,9 @@ class SessionService:
         
         # Commit transaction
         db.commit()
-        db.refresh(session)
         
-        logger.info("session_passcode_regenerated", session_id=session_id, workspace_id=session.workspace_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_passcode_regenerated", session_id=session_id, workspace_id=session.workspace_id)
         
         return session
     
@@ -1,18 +1,58 @@
 """Service for Timer module: state, start, pause, resume, reset."""
+import itertools
+import threading
 from typing import Any, Dict, Optional
 
+from cachetools import TTLCache
 from sqlalchemy.orm import Session as DBSession
 
+from core.config import settings
 from models.workspace_module import ModuleType
 from repositories.session_module_repository import SessionModuleRepository
 from repositories.session_repository import SessionRepository
-from repositories.workspace_repository import WorkspaceRepository
 from repositories.session_module_timer_state_repository import SessionModuleTimerStateRepository
 from utils.module_settings import get_timer_settings
+import logging
 import structlog
 
 logger = structlog.get_logger(__name__)
 
+_TIMER_MODULE = ModuleType.TIMER.value
+
+# (session_id, user_id) pairs whose workspace ownership was confirmed. A
+# session never moves to another workspace and workspaces never change owner,
+# so entries only expire; the TTL bounds memory, not staleness.
+_lecturer_access_cache: TTLCache = TTLCache(
+    maxsize=settings.LECTURER_ACCESS_CACHE_MAX_SIZE,
+    ttl=max(settings.LECTURER_ACCESS_CACHE_TTL_SECONDS, 1),
+)
+_lecturer_access_lock = threading.Lock()
+_LECTURER_ACCESS_CACHE_ENABLED = settings.LECTURER_ACCESS_CACHE_TTL_SECONDS > 0
+
+# Participant state responses keyed by (passcode, module_id, version). Writes in
+# this process bump the module version; other workers see them within the TTL.
+_state_cache: TTLCache = TTLCache(
+    maxsize=settings.TIMER_STATE_CACHE_MAX_SIZE,
+    ttl=max(settings.TIMER_STATE_CACHE_TTL_SECONDS, 1),
+)
+# Module versions expire with the states they orphan; the counter never reissues
+# one, so a lost version only lets older states run out their own TTL.
+_state_versions: TTLCache = TTLCache(
+    maxsize=settings.TIMER_STATE_CACHE_MAX_SIZE,
+    ttl=max(settings.TIMER_STATE_CACHE_TTL_SECONDS, 1),
+)
+_state_version_counter = itertools.count(1)
+_state_cache_lock = threading.Lock()
+_STATE_CACHE_ENABLED = settings.TIMER_STATE_CACHE_TTL_SECONDS > 0
+
+
+def _invalidate_state(module_id: int) -> None:
+    """Drop cached participant states of a module after a write in this process."""
+    if not _STATE_CACHE_ENABLED:
+        return
+    with _state_cache_lock:
+        _state_versions[module_id] = next(_state_version_counter)
+
 
 def _get_timer_options(module) -> dict:
     """Get Timer module settings with defaults."""
@@ -33,25 +73,41 @@ class SessionTimerService:
     """Business logic for Timer module."""
 
     @staticmethod
-    def _check_lecturer_access(db: DBSession, session_id: int, user_id: int) -> None:
-        """Verify user owns session workspace. Raises ValueError if not authorized."""
-        session = SessionRepository.get_by_id(db, session_id)
-        if not session:
-            raise ValueError("Session not found")
-        workspace = WorkspaceRepository.get_by_id(db, session.workspace_id)
-        if not workspace or workspace.user_id != user_id:
-            raise ValueError("Not authorized")
-
-    @staticmethod
-    def _validate_timer_module(db: DBSession, session_module_id: int, session_id: int) -> None:
-        """Ensure module exists, is Timer type, and belongs to session."""
-        module = SessionModuleRepository.get_by_id(db, session_module_id)
+    def _check_timer_module(module, session_id: int):
+        """Ensure already loaded module exists, is Timer type, and belongs to session. Returns module."""
         if not module or module.is_deleted:
             raise ValueError("Module not found")
         if module.session_id != session_id:
             raise ValueError("Module not in this session")
-        if module.module_type != ModuleType.TIMER.value:
+        if module.module_type != _TIMER_MODULE:
             raise ValueError("Module is not a Timer module")
+        return module
+
+    @staticmethod
+    def _load_lecturer_module(db: DBSession, session_id: int, user_id: int, module_id: int):
+        """
+        Load the Timer module for the session owner; session, workspace and module come
+        from one query, or only the module once ownership is cached.
+        Raises ValueError if not found or not authorized.
+        """
+        key = (session_id, user_id)
+        if _LECTURER_ACCESS_CACHE_ENABLED:
+            with _lecturer_access_lock:
+                owned = key in _lecturer_access_cache
+            if owned:
+                module = SessionModuleRepository.get_by_id(db, module_id)
+                return SessionTimerService._check_timer_module(module, session_id)
+
+        context = SessionRepository.get_with_workspace_and_module(db, session_id, module_id)
+        if not context:
+            raise ValueError("Session not found")
+        _, workspace, module = context
+        if not workspace or workspace.user_id != user_id:
+            raise ValueError("Not authorized")
+        if _LECTURER_ACCESS_CACHE_ENABLED:
+            with _lecturer_access_lock:
+                _lecturer_access_cache[key] = True
+        return SessionTimerService._check_timer_module(module, session_id)
 
     @staticmethod
     def get_state(
@@ -60,31 +116,42 @@ class SessionTimerService:
         module_id: int,
     ) -> Dict[str, Any]:
         """Get timer state for participants/lecturer. No auth required for by-passcode."""
-        session = SessionRepository.get_by_passcode(db, passcode)
-        if not session:
+        if _STATE_CACHE_ENABLED:
+            with _state_cache_lock:
+                key = (passcode, module_id, _state_versions.get(module_id, 0))
+                resp = _state_cache.get(key)
+            if resp is not None:
+                return resp
+
+        # Polled by every participant: one Core row duck-types as both module and state
+        row = SessionModuleTimerStateRepository.get_state_by_passcode(db, passcode, module_id)
+        if not row:
             raise ValueError("Session not found")
-        SessionTimerService._validate_timer_module(db, module_id, session.id)
+        module = row if row.id is not None else None
+        SessionTimerService._check_timer_module(module, row.passcode_session_id)
 
-        module = SessionModuleRepository.get_by_id(db, module_id)
-        opts = _get_timer_options(module) if module else {}
-        state = SessionModuleTimerStateRepository.get_by_module(db, module_id)
-        return _format_timer_response(state, opts)
+        opts = _get_timer_options(module)
+        state = row if row.has_state is not None else None
+        resp = _format_timer_response(state, opts)
+        if _STATE_CACHE_ENABLED:
+            with _state_cache_lock:
+                _state_cache[key] = resp
+        return resp
 
     @staticmethod
     def start(db: DBSession, session_id: int, user_id: int, module_id: int) -> Dict[str, Any]:
         """Lecturer: start timer. Commits."""
-        SessionTimerService._check_lecturer_access(db, session_id, user_id)
-        SessionTimerService._validate_timer_module(db, module_id, session_id)
-        module = SessionModuleRepository.get_by_id(db, module_id)
+        module = SessionTimerService._load_lecturer_module(db, session_id, user_id, module_id)
         opts = _get_timer_options(module)
         duration = opts.get("duration_seconds") or 60
         if duration <= 0:
             duration = 60
 
-        SessionModuleTimerStateRepository.start(db, module_id, duration)
+        state = SessionModuleTimerStateRepository.start(db, module_id, duration)
         db.commit()
-        state = SessionModuleTimerStateRepository.get_by_module(db, module_id)
-        logger.info("session_timer_started", module_id=module_id, duration=duration)
+        _invalidate_state(module_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("session_timer_started", module_id=module_id, duration=duration)
         return _format_timer_response(state, opts)
 
     @staticmethod
@@ -96,46 +163,40 @@ class SessionTimerService:
         remaining_seconds: int,
     ) -> Dict[str, Any]:
         """Lecturer: pause timer. Commits."""
-        SessionTimerService._check_lecturer_access(db, session_id, user_id)
-        SessionTimerService._validate_timer_module(db, module_id, session_id)
+        module = SessionTimerService._load_lecturer_module(db, session_id, user_id, module_id)
 
         state = SessionModuleTimerStateRepository.pause(db, module_id, remaining_seconds)
         if not state:
             raise ValueError("Timer state not found (start timer first)")
-        module = SessionModuleRepository.get_by_id(db, module_id)
-        opts = _get_timer_options(module) if module else {}
+        opts = _get_timer_options(module)
         db.commit()
-        db.refresh(state)
+        _invalidate_state(module_id)
         return _format_timer_response(state, opts)
 
     @staticmethod
     def resume(db: DBSession, session_id: int, user_id: int, module_id: int) -> Dict[str, Any]:
         """Lecturer: resume timer. Commits."""
-        SessionTimerService._check_lecturer_access(db, session_id, user_id)
-        SessionTimerService._validate_timer_module(db, module_id, session_id)
+        module = SessionTimerService._load_lecturer_module(db, session_id, user_id, module_id)
 
         state = SessionModuleTimerStateRepository.resume(db, module_id)
         if not state:
             raise ValueError("Timer state not found or not paused")
-        module = SessionModuleRepository.get_by_id(db, module_id)
-        opts = _get_timer_options(module) if module else {}
+        opts = _get_timer_options(module)
         db.commit()
-        db.refresh(state)
+        _invalidate_state(module_id)
         return _format_timer_response(state, opts)
 
     @staticmethod
     def reset(db: DBSession, session_id: int, user_id: int, module_id: int) -> Dict[str, Any]:
         """Lecturer: reset timer. Commits."""
-        SessionTimerService._check_lecturer_access(db, session_id, user_id)
-        SessionTimerService._validate_timer_module(db, module_id, session_id)
+        module = SessionTimerService._load_lecturer_module(db, session_id, user_id, module_id)
 
         state = SessionModuleTimerStateRepository.reset(db, module_id)
-        module = SessionModuleRepository.get_by_id(db, module_id)
-        opts = _get_timer_options(module) if module else {}
+        opts = _get_timer_options(module)
         resp = _format_timer_response(state, opts)
         if state:
             db.commit()
-            db.refresh(state)
+            _invalidate_state(module_id)
         return resp
 
     @staticmethod
@@ -147,15 +208,13 @@ class SessionTimerService:
         remaining_seconds: int,
     ) -> Dict[str, Any]:
         """Lecturer: set timer to paused with given remaining_seconds. Commits."""
-        SessionTimerService._check_lecturer_access(db, session_id, user_id)
-        SessionTimerService._validate_timer_module(db, module_id, session_id)
+        module = SessionTimerService._load_lecturer_module(db, session_id, user_id, module_id)
         if remaining_seconds < 0:
             remaining_seconds = 0
         state = SessionModuleTimerStateRepository.set_paused_with_remaining(
             db, module_id, remaining_seconds
         )
-        module = SessionModuleRepository.get_by_id(db, module_id)
-        opts = _get_timer_options(module) if module else {}
+        opts = _get_timer_options(module)
         db.commit()
-        db.refresh(state)
+        _invalidate_state(module_id)
         return _format_timer_response(state, opts)
@@ -63,7 +63,6 @@ class UserService:
         if updated_user:
             # Commit transaction
             db.commit()
-            db.refresh(updated_user)
             
             logger.info(
                 "user_profile_updated",
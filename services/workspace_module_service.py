@@ -3,7 +3,7 @@ from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
 from repositories.workspace_module_repository import WorkspaceModuleRepository
 from repositories.workspace_repository import WorkspaceRepository
-from models.workspace_module import WorkspaceModule, ModuleType
+from models.workspace_module import WorkspaceModule, MODULE_TYPE_VALUES
 from utils.module_settings import validate_module_settings
 import structlog
 
@@ -52,7 +52,7 @@ class WorkspaceModuleService:
             raise ValueError("Cannot create module in deleted workspace")
         
         # Validate module type
-        if module_type not in [mt.value for mt in ModuleType]:
+        if module_type not in MODULE_TYPE_VALUES:
             raise ValueError(f"Invalid module type: {module_type}")
         
         # Validate settings
@@ -69,7 +69,6 @@ class WorkspaceModuleService:
         
         # Commit transaction
         db.commit()
-        db.refresh(module)
         
         logger.info("workspace_module_created", module_id=module.id, workspace_id=workspace_id, module_type=module_type)
         
@@ -121,7 +120,7 @@ class WorkspaceModuleService:
             raise ValueError("Module not found or access denied")
         
         # Validate module type if provided
-        if module_type is not None and module_type not in [mt.value for mt in ModuleType]:
+        if module_type is not None and module_type not in MODULE_TYPE_VALUES:
             raise ValueError(f"Invalid module type: {module_type}")
         
         # Validate settings if provided
@@ -139,7 +138,6 @@ class WorkspaceModuleService:
         
         if updated_module:
             db.commit()
-            db.refresh(updated_module)
             logger.info("workspace_module_updated", module_id=module_id, workspace_id=workspace_id)
         
         return updated_module
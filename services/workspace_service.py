@@ -13,6 +13,11 @@ from utils.template_settings import validate_template_settings as validate_templ
 
 logger = structlog.get_logger(__name__)
 
+_SESSION_ARCHIVE = SessionStatus.ARCHIVE.value
+_SESSION_ACTIVE = SessionStatus.ACTIVE.value
+_WS_ARCHIVE = WorkspaceStatus.ARCHIVE.value
+_WS_ACTIVE = WorkspaceStatus.ACTIVE.value
+
 
 class WorkspaceService:
     """Service for workspace operations."""
@@ -57,7 +62,6 @@ class WorkspaceService:
         
         # Commit transaction
         db.commit()
-        db.refresh(workspace)
         
         logger.info("workspace_created", workspace_id=workspace.id, user_id=user_id, name=name)
         
@@ -93,35 +97,28 @@ class WorkspaceService:
             raise ValueError("Cannot archive deleted workspace")
         
         # Archive all active sessions in workspace
-        active_sessions = SessionRepository.get_by_workspace_id(
+        sessions_ended = SessionRepository.bulk_update_status_by_workspace(
             db=db,
             workspace_id=workspace_id,
-            status=SessionStatus.ACTIVE.value
+            from_status=_SESSION_ACTIVE,
+            to_status=_SESSION_ARCHIVE
         )
         
-        for session in active_sessions:
-            SessionRepository.update_status(
-                db=db,
-                session_id=session.id,
-                status=SessionStatus.ARCHIVE.value
-            )
-        
         # Update workspace status
         WorkspaceRepository.update_status(
             db=db,
             workspace_id=workspace_id,
-            status=WorkspaceStatus.ARCHIVE.value
+            status=_WS_ARCHIVE
         )
         
         # Commit transaction
         db.commit()
-        db.refresh(workspace)
         
         logger.info(
             "workspace_archived",
             workspace_id=workspace_id,
             user_id=user_id,
-            sessions_ended=len(active_sessions)
+            sessions_ended=sessions_ended
         )
         
         return workspace
@@ -159,12 +156,11 @@ class WorkspaceService:
         WorkspaceRepository.update_status(
             db=db,
             workspace_id=workspace_id,
-            status=WorkspaceStatus.ACTIVE.value
+            status=_WS_ACTIVE
         )
         
         # Commit transaction
         db.commit()
-        db.refresh(workspace)
         
         logger.info("workspace_unarchived", workspace_id=workspace_id, user_id=user_id)
         
@@ -210,7 +206,6 @@ class WorkspaceService:
         
         # Commit transaction
         db.commit()
-        db.refresh(workspace)
         
         logger.info("workspace_restored", workspace_id=workspace_id, user_id=user_id)
         
@@ -248,7 +243,7 @@ class WorkspaceService:
             active_sessions = SessionRepository.get_by_workspace_id(
                 db=db,
                 workspace_id=workspace_id,
-                status=SessionStatus.ACTIVE.value
+                status=_SESSION_ACTIVE
             )
             # Filter only running sessions (not stopped)
             running_sessions = [s for s in active_sessions if not s.is_stopped]
@@ -330,7 +325,6 @@ class WorkspaceService:
 
         # Commit transaction
         db.commit()
-        db.refresh(workspace)
         
         logger.info("workspace_updated", workspace_id=workspace_id, user_id=user_id)
         
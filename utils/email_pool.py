@@ -0,0 +1,158 @@
+"""Background delivery of verification emails over a persistent SMTP connection."""
+import queue
+import smtplib
+import threading
+import time
+from email.message import Message
+from typing import List, Optional
+import structlog
+from core.config import settings
+from utils.email import build_verification_message, print_dev_verification_code
+
+logger = structlog.get_logger(__name__)
+
+# Settings are fixed for the process lifetime; also used by callers deciding
+# whether to return codes in dev mode.
+SMTP_CONFIGURED = bool(
+    settings.SMTP_HOST and settings.SMTP_USER and settings.SMTP_PASSWORD and settings.SMTP_FROM_EMAIL
+)
+
+_STOP = object()
+
+_queue: "queue.Queue" = queue.Queue(maxsize=settings.SMTP_QUEUE_MAX_SIZE)
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+
+
+class _SMTPConnection:
+    """Authenticated SMTP session reused across messages."""
+
+    def __init__(self) -> None:
+        self._server: Optional[smtplib.SMTP] = None
+        self._sent = 0
+        # Whether the last send() went over a session opened for an earlier message
+        self.reused = False
+
+    def _open(self) -> None:
+        smtp_port = settings.SMTP_PORT or 587
+        smtp_use_tls = settings.SMTP_USE_TLS if settings.SMTP_USE_TLS is not None else True
+        server = smtplib.SMTP(settings.SMTP_HOST, smtp_port, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            if smtp_use_tls:
+                server.starttls()
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+        self._sent = 0
+
+    def _is_alive(self) -> bool:
+        """NOOP health check before reusing an idle connection."""
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+    def send(self, msg: Message) -> None:
+        if self._server is not None and (
+            self._sent >= settings.SMTP_MAX_MESSAGES_PER_CONN or not self._is_alive()
+        ):
+            self.close()
+        self.reused = self._server is not None
+        if self._server is None:
+            self._open()
+        self._server.send_message(msg)
+        self._sent += 1
+
+
+def _deliver(connection: _SMTPConnection, email: str, code: str) -> None:
+    msg = build_verification_message(email, code)
+    try:
+        connection.send(msg)
+    except (smtplib.SMTPServerDisconnected, ConnectionError):
+        # Server dropped a cached session between messages; retry once on a fresh
+        # one. Other SMTP errors (also OSError subclasses) may mean the message was
+        # rejected or already accepted, so they are not resent.
+        if not connection.reused:
+            raise
+        connection.close()
+        connection.send(msg)
+
+
+def _run() -> None:
+    connection = _SMTPConnection()
+    while True:
+        item = _queue.get()
+        if item is _STOP:
+            break
+        email, code = item
+        try:
+            _deliver(connection, email, code)
+            logger.info("Verification email sent", email=email)
+        except Exception as e:
+            connection.close()
+            logger.error("Failed to send verification email", email=email, error=str(e), exc_info=True)
+    connection.close()
+
+
+def _ensure_workers() -> None:
+    if _workers:
+        return
+    with _workers_lock:
+        if _workers:
+            return
+        # Each sender owns one SMTP connection, so this also caps concurrent
+        # sessions against the provider.
+        for i in range(max(settings.SMTP_SENDER_WORKERS, 1)):
+            worker = threading.Thread(target=_run, name=f"smtp-sender-{i}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def queue_verification_email(email: str, code: str) -> bool:
+    """
+    Queue verification code email for background delivery.
+    
+    Args:
+        email: Recipient email address
+        code: Verification code to send
+    
+    Returns:
+        True if the email was queued (or printed in dev mode), False if the queue is full
+    """
+    if not SMTP_CONFIGURED:
+        print_dev_verification_code(email, code)
+        return True
+    _ensure_workers()
+    try:
+        _queue.put_nowait((email, code))
+    except queue.Full:
+        logger.error("Verification email queue full", email=email)
+        return False
+    return True
+
+
+def shutdown_email_pool(timeout: float = 10.0) -> None:
+    """Drain queued emails, then QUIT the SMTP connections, waiting at most timeout seconds."""
+    deadline = time.monotonic() + timeout
+    with _workers_lock:
+        workers = list(_workers)
+        _workers.clear()
+    for _ in workers:
+        try:
+            _queue.put(_STOP, timeout=max(deadline - time.monotonic(), 0))
+        except queue.Full:
+            logger.warning("Verification email queue not drained before shutdown", pending=_queue.qsize())
+            return
+    for worker in workers:
+        worker.join(max(deadline - time.monotonic(), 0))
@@ -0,0 +1,37 @@
+"""Conditional GET (ETag / If-None-Match) helpers for polled JSON endpoints."""
+import hashlib
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response, status
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header value against etag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def etag_json_response(payload: Any, if_none_match: Optional[str] = None) -> Response:
+    """
+    Encode payload with orjson and tag it with a content hash ETag.
+
+    Returns 304 without a body when if_none_match already names this content.
+    The tag is derived from the exact bytes sent, so it is valid across workers
+    and covers per-viewer fields. Clients are asked to revalidate every time.
+    """
+    body = orjson.dumps(payload)
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,6 +1,8 @@
 """Module settings validation utilities."""
+from functools import lru_cache
 from typing import Dict, Any, Optional, Literal
 
+import orjson
 from pydantic import BaseModel, Field
 
 from models.workspace_module import ModuleType
@@ -154,17 +156,38 @@ def validate_timer_settings(settings: Dict[str, Any]) -> None:
         raise ValueError(f"Invalid timer settings: {e}") from e
 
 
+def _settings_key(settings: Optional[Dict[str, Any]]) -> bytes:
+    """Canonical JSON of a settings dict, used as a memo key."""
+    return orjson.dumps(settings or {}, option=orjson.OPT_SORT_KEYS)
+
+
+@lru_cache(maxsize=4096)
+def _parse_questions_settings(settings_key: bytes) -> Dict[str, Any]:
+    return QuestionsModuleSettings.model_validate(orjson.loads(settings_key)).model_dump()
+
+
+@lru_cache(maxsize=4096)
+def _parse_timer_settings(settings_key: bytes) -> Dict[str, Any]:
+    return TimerModuleSettings.model_validate(orjson.loads(settings_key)).model_dump()
+
+
 def get_questions_settings(settings: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    """Return Questions module settings with defaults applied (as dict)."""
-    return QuestionsModuleSettings.model_validate(settings or {}).model_dump()
+    """Return Questions module settings with defaults applied (as dict).
+    Validation is memoized per distinct settings content; each call gets its own copy.
+    """
+    return dict(_parse_questions_settings(_settings_key(settings)))
 
 
 def get_questions_max_length(opts: Dict[str, Any]) -> int:
-    """Get max character limit from Questions settings."""
-    parsed = QuestionsModuleSettings.model_validate(opts)
-    return parsed.get_max_length()
+    """Get max character limit from Questions settings (as returned by get_questions_settings)."""
+    return QUESTIONS_LENGTH_LIMITS.get(
+        opts.get("length_limit_mode"),
+        QUESTIONS_LENGTH_LIMITS["moderate"],
+    )
 
 
 def get_timer_settings(settings: Optional[Dict[str, Any]]) -> Dict[str, Any]:
-    """Return Timer module settings with defaults applied (as dict)."""
-    return TimerModuleSettings.model_validate(settings or {}).model_dump()
+    """Return Timer module settings with defaults applied (as dict).
+    Validation is memoized per distinct settings content; each call gets its own copy.
+    """
+    return dict(_parse_timer_settings(_settings_key(settings)))
@@ -2,10 +2,22 @@
 import random
 import string
 from typing import Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from models.session import Session as SessionModel
 
 
+# Uppercase letters and digits for better readability, excluding confusing
+# characters: 0, O, 1, I
+_PASSCODE_CHARACTERS = ''.join(
+    c for c in string.ascii_uppercase + string.digits if c not in '0O1I'
+)
+_PASSCODE_CHARACTER_SET = frozenset(_PASSCODE_CHARACTERS)
+
+# Candidates checked per uniqueness query
+_CANDIDATE_BATCH_SIZE = 8
+
+
 def generate_passcode(length: int = 6) -> str:
     """
     Generate a random alphanumeric passcode.
@@ -16,20 +28,19 @@ def generate_passcode(length: int = 6) -> str:
     Returns:
         Random alphanumeric string
     """
-    # Use uppercase letters and digits for better readability
-    characters = string.ascii_uppercase + string.digits
-    # Exclude confusing characters: 0, O, 1, I
-    characters = characters.replace('0', '').replace('O', '').replace('1', '').replace('I', '')
-    return ''.join(random.choices(characters, k=length))
+    return ''.join(random.choices(_PASSCODE_CHARACTERS, k=length))
 
 
 def generate_unique_passcode(db: Session, max_attempts: int = 100) -> str:
     """
     Generate a unique passcode that doesn't exist in the database.
     
+    Candidates are checked in batches with one IN query each, so a
+    collision does not cost an extra round trip.
+    
     Args:
         db: Database session
-        max_attempts: Maximum number of attempts to generate unique passcode
+        max_attempts: Maximum number of candidates to try
     
     Returns:
         Unique passcode
@@ -37,14 +48,18 @@ def generate_unique_passcode(db: Session, max_attempts: int = 100) -> str:
     Raises:
         ValueError: If unable to generate unique passcode after max_attempts
     """
-    for _ in range(max_attempts):
-        passcode = generate_passcode()
-        # Check if passcode already exists (including deleted sessions)
-        existing = db.query(SessionModel).filter(
-            SessionModel.passcode == passcode
-        ).first()
-        if not existing:
-            return passcode
+    remaining = max_attempts
+    while remaining > 0:
+        batch_size = min(_CANDIDATE_BATCH_SIZE, remaining)
+        remaining -= batch_size
+        candidates = {generate_passcode() for _ in range(batch_size)}
+        # Passcodes already taken (including deleted sessions)
+        taken = set(db.execute(
+            select(SessionModel.passcode).where(SessionModel.passcode.in_(candidates))
+        ).scalars())
+        for passcode in candidates:
+            if passcode not in taken:
+                return passcode
     
     raise ValueError(f"Unable to generate unique passcode after {max_attempts} attempts")
 
@@ -64,10 +79,5 @@ def validate_passcode_format(passcode: str) -> bool:
     if len(passcode) != 6:
         return False
     # Check if all characters are alphanumeric (excluding confusing chars)
-    valid_chars = set(string.ascii_uppercase + string.digits)
-    valid_chars.discard('0')
-    valid_chars.discard('O')
-    valid_chars.discard('1')
-    valid_chars.discard('I')
-    return all(c in valid_chars for c in passcode)
+    return all(c in _PASSCODE_CHARACTER_SET for c in passcode)
 
@@ -1,15 +1,66 @@
 """Password hashing utilities."""
-import bcrypt
+import hashlib
+import hmac
+import secrets
+import threading
+from cachetools import TTLCache
+from passlib.context import CryptContext
+from core.config import settings
+
+# argon2id for new hashes; bcrypt hashes still verify and are flagged for rehash.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+    argon2__memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+)
 
 
 def hash_password(password: str) -> str:
-    """Hash password using bcrypt."""
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-    return hashed.decode('utf-8')
+    """Hash password using the preferred scheme (argon2id)."""
+    return pwd_context.hash(password)
 
 
 def verify_password(password: str, password_hash: str) -> bool:
     """Verify password against hash."""
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    return pwd_context.verify(password, password_hash)
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """Check whether hash uses a deprecated scheme or outdated parameters."""
+    return pwd_context.needs_update(password_hash)
+
+
+# Recent successful verifications, keyed by user id and an HMAC tag over the
+# stored hash and password. The key is random per process and never leaves
+# memory; a changed hash yields a different tag, so password changes need no
+# explicit invalidation.
+_VERIFY_CACHE_KEY = secrets.token_bytes(32)
+_verify_cache: TTLCache = TTLCache(
+    maxsize=settings.PASSWORD_VERIFY_CACHE_MAX_SIZE,
+    ttl=max(settings.PASSWORD_VERIFY_CACHE_TTL_SECONDS, 1),
+)
+_verify_cache_lock = threading.Lock()
+_VERIFY_CACHE_ENABLED = settings.PASSWORD_VERIFY_CACHE_TTL_SECONDS > 0
+
 
+def verify_password_cached(password: str, user_id: int, password_hash: str) -> bool:
+    """Verify password, skipping the slow hash for a recently verified (user, hash, password)."""
+    if not _VERIFY_CACHE_ENABLED:
+        return verify_password(password, password_hash)
+    tag = hmac.new(
+        _VERIFY_CACHE_KEY,
+        f"{user_id}:{password_hash}:{password}".encode("utf-8"),
+        hashlib.sha256,
+    ).digest()
+    with _verify_cache_lock:
+        cached_tag = _verify_cache.get(user_id)
+    if cached_tag is not None and hmac.compare_digest(cached_tag, tag):
+        return True
+    if not verify_password(password, password_hash):
+        return False
+    with _verify_cache_lock:
+        _verify_cache[user_id] = tag
+    return True